@@ -0,0 +1,265 @@
+"""
+Conflict-Driven Clause Learning (CDCL) SAT solver.
+
+Variables are positive integers and literals are non-zero integers, where -v
+is the negation of v. Clauses are lists of literals. The solver uses two
+watched literals for unit propagation, learns first-UIP clauses from every
+conflict, picks decisions by VSIDS activity with phase saving and restarts
+following the Luby sequence.
+"""
+
+import heapq
+
+
+def luby(index: int) -> int:
+    """Returns the index-th element (starting at 0) of the Luby sequence
+    1, 1, 2, 1, 1, 2, 4, 1, 1, 2, ..."""
+    size, power = 1, 0
+    while size < index + 1:
+        power += 1
+        size = 2 * size + 1
+    while size - 1 != index:
+        size = (size - 1) >> 1
+        power -= 1
+        index = index % size
+    return 1 << power
+
+
+class CDCLSolver:
+    """Incremental CNF builder and CDCL solver"""
+
+    RESTART_BASE = 100
+    ACTIVITY_DECAY = 0.95
+
+    def __init__(self):
+        self.num_vars = 0
+        self.clauses = []
+        # Clauses watching each literal, to be visited when it becomes false
+        self.watches = {}
+        # Per variable: 1 if true, -1 if false, 0 if unassigned
+        self.values = [0]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [False]
+        self.activity_increment = 1.0
+        self.order = []
+
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+        self.unsatisfiable = False
+
+        self.conflicts = 0
+        self.decisions = 0
+
+    def new_var(self) -> int:
+        self.num_vars += 1
+        self.values.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(False)
+        self.watches[self.num_vars] = []
+        self.watches[-self.num_vars] = []
+        heapq.heappush(self.order, (0.0, self.num_vars))
+        return self.num_vars
+
+    def value(self, literal: int) -> int:
+        """Returns 1 if the literal is true, -1 if false and 0 if unassigned"""
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """Adds a clause, which must be added before solving. Returns False
+        if the formula is already known to be unsatisfiable."""
+        if self.unsatisfiable:
+            return False
+
+        clause = []
+        for literal in literals:
+            # Clauses are only added before solving, so every assignment is
+            # at level 0 and can be used to simplify the clause
+            value = self.value(literal)
+            if value == 1 or -literal in clause:
+                return True
+            if value == 0 and literal not in clause:
+                clause.append(literal)
+
+        if len(clause) == 0:
+            self.unsatisfiable = True
+        elif len(clause) == 1:
+            self.enqueue(clause[0], None)
+            self.unsatisfiable = self.propagate() is not None
+        else:
+            self.attach(clause)
+        return not self.unsatisfiable
+
+    def attach(self, clause) -> int:
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def enqueue(self, literal: int, reason):
+        var = abs(literal)
+        self.values[var] = 1 if literal > 0 else -1
+        self.levels[var] = len(self.trail_limits)
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """Propagates every pending assignment, returning the index of a
+        conflicting clause, or None"""
+        values, clauses, watches = self.values, self.clauses, self.watches
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+
+            watching = watches[false_literal]
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                # Keep the false literal in the second position
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], false_literal
+
+                first = clause[0]
+                first_value = values[abs(first)] if first > 0 else -values[-first]
+                if first_value == 1:
+                    kept.append(index)
+                    continue
+
+                for other in range(2, len(clause)):
+                    literal = clause[other]
+                    value = values[abs(literal)] if literal > 0 else -values[-literal]
+                    if value != -1:
+                        clause[1], clause[other] = literal, false_literal
+                        watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first_value == -1:
+                        kept.extend(watching[position + 1 :])
+                        watches[false_literal] = kept
+                        return index
+                    self.enqueue(first, index)
+
+            watches[false_literal] = kept
+        return None
+
+    def bump(self, var: int):
+        self.activity[var] += self.activity_increment
+        if self.activity[var] > 1e100:
+            # Rescale every activity to avoid overflowing
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.activity_increment *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, self.num_vars + 1)]
+            heapq.heapify(self.order)
+        else:
+            heapq.heappush(self.order, (-self.activity[var], var))
+
+    def analyze(self, conflict: int):
+        """Returns the first-UIP clause learnt from the conflict, with the
+        asserting literal first, and the level to backtrack to"""
+        level = len(self.trail_limits)
+        seen = set()
+        learnt = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+
+        while True:
+            for literal in clause:
+                var = abs(literal)
+                if var in seen or self.levels[var] == 0:
+                    continue
+                seen.add(var)
+                self.bump(var)
+                if self.levels[var] == level:
+                    pending += 1
+                else:
+                    learnt.append(literal)
+
+            # Walk back the trail to the next literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learnt[0] = -literal
+        self.activity_increment /= self.ACTIVITY_DECAY
+
+        if len(learnt) == 1:
+            return learnt, 0
+        # Watch the literal of the highest level after the asserting one
+        highest = max(range(1, len(learnt)), key=lambda i: self.levels[abs(learnt[i])])
+        learnt[1], learnt[highest] = learnt[highest], learnt[1]
+        return learnt, self.levels[abs(learnt[1])]
+
+    def backtrack(self, level: int):
+        if len(self.trail_limits) <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            var = abs(literal)
+            self.phases[var] = literal > 0
+            self.values[var] = 0
+            self.reasons[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.propagated = len(self.trail)
+
+    def decide(self) -> bool:
+        """Assigns the unassigned variable with the highest activity,
+        returning False if every variable is assigned"""
+        while self.order:
+            activity, var = heapq.heappop(self.order)
+            if self.values[var] == 0 and -activity == self.activity[var]:
+                self.decisions += 1
+                self.trail_limits.append(len(self.trail))
+                self.enqueue(var if self.phases[var] else -var, None)
+                return True
+        # Entries may be stale after rescaling, so check every variable
+        for var in range(1, self.num_vars + 1):
+            if self.values[var] == 0:
+                heapq.heappush(self.order, (-self.activity[var], var))
+                return self.decide()
+        return False
+
+    def solve(self):
+        """Returns a model as a list of booleans indexed by variable, or
+        None if the formula is unsatisfiable"""
+        if self.unsatisfiable:
+            return None
+
+        restarts = 0
+        conflicts_until_restart = self.RESTART_BASE * luby(restarts)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if len(self.trail_limits) == 0:
+                    self.unsatisfiable = True
+                    return None
+
+                learnt, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learnt) == 1:
+                    self.enqueue(learnt[0], None)
+                else:
+                    self.enqueue(learnt[0], self.attach(learnt))
+
+                conflicts_until_restart -= 1
+                if conflicts_until_restart == 0:
+                    restarts += 1
+                    conflicts_until_restart = self.RESTART_BASE * luby(restarts)
+                    self.backtrack(0)
+            elif not self.decide():
+                return [value > 0 for value in self.values]
@@ -61,6 +61,12 @@ class Problem:
         and related algorithms try to maximize this value."""
         raise NotImplementedError
 
+    def tiebreak(self, node):
+        """Secondary key of a node in best-first search, for nodes with the
+        same f value, lowest first. The remaining ties are popped in the
+        order the nodes were added to the frontier."""
+        return 0
+
 
 # ______________________________________________________________________________
 
@@ -71,9 +77,12 @@ class Node:
     that if a state is arrived at by two paths, then there are two nodes with
     the same state. Also includes the action that got us to this state, and
     the total path_cost (also known as g) to reach the node. Other functions
-    may add an f and h value; see best_first_graph_search and astar_search for
-    an explanation of how the f and h values are handled. You will not need to
-    subclass this class."""
+    may fill in the f and h values, which start as None; see
+    best_first_graph_search and astar_search for an explanation of how the f
+    and h values are handled. Nodes use __slots__, so no other attributes can
+    be added to them. You will not need to subclass this class."""
+
+    __slots__ = ('state', 'parent', 'action', 'path_cost', 'depth', 'f', 'h')
 
     def __init__(self, state, parent=None, action=None, path_cost=0):
         """Create a search tree Node, derived from a parent by an action."""
@@ -81,6 +90,8 @@ class Node:
         self.parent = parent
         self.action = action
         self.path_cost = path_cost
+        self.f = None
+        self.h = None
         self.depth = 0
         if parent:
             self.depth = parent.depth + 1
@@ -96,6 +107,12 @@ class Node:
         return [self.child_node(problem, action)
                 for action in problem.actions(self.state)]
 
+    def iter_expand(self, problem):
+        """Yield the nodes reachable in one step from this node, building
+        each one only when it is needed."""
+        for action in problem.actions(self.state):
+            yield self.child_node(problem, action)
+
     def child_node(self, problem, action):
         """[Figure 3.10]"""
         next_state = problem.result(self.state, action)
@@ -267,7 +284,7 @@ def best_first_graph_search(problem, f, display=False):
     a best first search you can examine the f values of the path returned."""
     f = memoize(f, 'f')
     node = Node(problem.initial)
-    frontier = PriorityQueue('min', f)
+    frontier = IndexedPriorityQueue('min', f, problem.tiebreak)
     frontier.append(node)
     explored = set()
     while frontier:
@@ -293,25 +310,29 @@ def uniform_cost_search(problem, display=False):
 
 
 def depth_limited_search(problem, limit=50):
-    """[Figure 3.17]"""
-
-    def recursive_dls(node, problem, limit):
-        if problem.goal_test(node.state):
-            return node
-        elif limit == 0:
-            return 'cutoff'
+    """[Figure 3.17]
+    Iterative version of the recursive algorithm: a stack keeps the
+    successors still to visit at each level, so the depth is not bound by
+    the recursion limit."""
+    node = Node(problem.initial)
+    if problem.goal_test(node.state):
+        return node
+    elif limit == 0:
+        return 'cutoff'
+
+    cutoff_occurred = False
+    stack = [node.iter_expand(problem)]
+    while stack:
+        child = next(stack[-1], None)
+        if child is None:
+            stack.pop()
+        elif problem.goal_test(child.state):
+            return child
+        elif child.depth == limit:
+            cutoff_occurred = True
         else:
-            cutoff_occurred = False
-            for child in node.expand(problem):
-                result = recursive_dls(child, problem, limit - 1)
-                if result == 'cutoff':
-                    cutoff_occurred = True
-                elif result is not None:
-                    return result
-            return 'cutoff' if cutoff_occurred else None
-
-    # Body of depth_limited_search:
-    return recursive_dls(Node(problem.initial), problem, limit)
+            stack.append(child.iter_expand(problem))
+    return 'cutoff' if cutoff_occurred else None
 
 
 def iterative_deepening_search(problem):
@@ -322,6 +343,39 @@ def iterative_deepening_search(problem):
             return result
 
 
+def iterative_deepening_astar_search(problem, h=None):
+    """IDA*: depth-first searches that prune every node with f = g + h above
+    a bound, starting at the f of the initial node and raised to the
+    smallest f pruned by the previous search. Only the current path is kept,
+    in an explicit stack of lazy successor iterators, so memory is linear in
+    the depth."""
+    h = memoize(h or problem.h, 'h')
+    node = Node(problem.initial)
+    bound = node.path_cost + h(node)
+    while True:
+        if problem.goal_test(node.state):
+            return node
+
+        next_bound = np.inf
+        stack = [node.iter_expand(problem)]
+        while stack:
+            child = next(stack[-1], None)
+            if child is None:
+                stack.pop()
+                continue
+            f = child.path_cost + h(child)
+            if f > bound:
+                next_bound = min(next_bound, f)
+            elif problem.goal_test(child.state):
+                return child
+            else:
+                stack.append(child.iter_expand(problem))
+
+        if next_bound == np.inf:
+            return None
+        bound = next_bound
+
+
 # ______________________________________________________________________________
 # Bidirectional Search
 # Pseudocode from https://webdocs.cs.ualberta.ca/%7Eholte/Publications/MM-AAAI2016.pdf
@@ -423,6 +477,39 @@ def astar_search(problem, h=None, display=False):
     return best_first_graph_search(problem, lambda n: n.path_cost + h(n), display)
 
 
+def weighted_astar_search(problem, weight=2, h=None, display=False):
+    """Weighted A* search is best-first graph search with f(n) = g(n)+w*h(n).
+    Weights above 1 trust the heuristic more, finding a solution with fewer
+    nodes in the frontier, at most w times costlier than the optimal one."""
+    h = memoize(h or problem.h, 'h')
+    return best_first_graph_search(problem, lambda n: n.path_cost + weight * h(n), display)
+
+
+def beam_search(problem, width=10, h=None):
+    """Breadth-first search that only keeps the width nodes with the lowest
+    h(n) at each depth, so memory is bounded by the width. If the beam runs
+    out of nodes after some were dropped, the search starts again with twice
+    the width, so a solution is always found if there is one."""
+    h = memoize(h or problem.h, 'h')
+    while True:
+        beam = [Node(problem.initial)]
+        pruned = False
+        while beam:
+            for node in beam:
+                if problem.goal_test(node.state):
+                    return node
+            # Equal nodes reached from different parents are kept once
+            children = list(dict.fromkeys(child for node in beam for child in node.expand(problem)))
+            if len(children) > width:
+                children.sort(key=lambda n: (h(n), problem.tiebreak(n)))
+                del children[width:]
+                pruned = True
+            beam = children
+        if not pruned:
+            return None
+        width *= 2
+
+
 # ______________________________________________________________________________
 # A* heuristics
 
@@ -604,10 +691,18 @@ class PlanRoute(Problem):
 
 
 def recursive_best_first_search(problem, h=None):
-    """[Figure 3.26]"""
+    """[Figure 3.26]
+    Iterative version of the recursive algorithm: each call of RBFS is a
+    frame in an explicit stack, so the depth is not bound by the recursion
+    limit."""
     h = memoize(h or problem.h, 'h')
+    # Each frame holds the successors of a node being explored, with the
+    # best one first while it is being explored, and its f limit
+    frames = []
 
-    def RBFS(problem, node, flimit):
+    def RBFS(node, flimit):
+        """Start exploring node, returning its result and f value if it
+        does not need a frame"""
         if problem.goal_test(node.state):
             return node, 0  # (The second value is immaterial)
         successors = node.expand(problem)
@@ -615,24 +710,36 @@ def recursive_best_first_search(problem, h=None):
             return None, np.inf
         for s in successors:
             s.f = max(s.path_cost + h(s), node.f)
-        while True:
-            # Order by lowest f value
-            successors.sort(key=lambda x: x.f)
-            best = successors[0]
-            if best.f > flimit:
-                return None, best.f
-            if len(successors) > 1:
-                alternative = successors[1].f
-            else:
-                alternative = np.inf
-            result, best.f = RBFS(problem, best, min(flimit, alternative))
-            if result is not None:
-                return result, best.f
+        frames.append((successors, flimit))
+        return None
 
     node = Node(problem.initial)
     node.f = h(node)
-    result, bestf = RBFS(problem, node, np.inf)
-    return result
+    returned = RBFS(node, np.inf)
+    while True:
+        if returned is not None:
+            result, f = returned
+            if not frames:
+                return result
+            successors, flimit = frames[-1]
+            successors[0].f = f
+            if result is not None:
+                frames.pop()
+                continue
+
+        successors, flimit = frames[-1]
+        # Order by lowest f value
+        successors.sort(key=lambda x: x.f)
+        best = successors[0]
+        if best.f > flimit:
+            frames.pop()
+            returned = None, best.f
+            continue
+        if len(successors) > 1:
+            alternative = successors[1].f
+        else:
+            alternative = np.inf
+        returned = RBFS(best, min(flimit, alternative))
 
 
 def hill_climbing(problem):
@@ -1546,6 +1653,9 @@ class InstrumentedProblem(Problem):
     def value(self, state):
         return self.problem.value(state)
 
+    def tiebreak(self, node):
+        return self.problem.tiebreak(node)
+
     def __getattr__(self, attr):
         return getattr(self.problem, attr)
 
@@ -6,20 +6,131 @@
 # 99209 Diogo Romão Cardoso
 # 99211 Diogo Torres Correia
 
+import argparse
+import collections
+import concurrent.futures
+import functools
+import glob
+import itertools
+import multiprocessing
+import os
+import queue
+import random
 import sys
+import time
 import numpy as np
+from sat import CDCLSolver
 from search import (
     Problem,
     Node,
     astar_search,
+    beam_search,
     breadth_first_tree_search,
     depth_first_tree_search,
     greedy_search,
+    iterative_deepening_astar_search,
     recursive_best_first_search,
+    weighted_astar_search,
+)
+
+# Lines bigger than this have too many valid patterns to be enumerated
+MAX_PATTERN_LINE_SIZE = 24
+
+# Bigger nogoods are rarely matched again and are not worth recording
+MAX_NOGOOD_SIZE = 16
+
+
+@functools.lru_cache(maxsize=None)
+def valid_lines(size: int):
+    """Returns every line of the given size that follows the balance and
+    adjacency rules, encoded as integers with a bit set for each one"""
+    max_of_type = (size + 1) // 2
+    lines = []
+
+    def complete_line(index, ones, zero_count, one_count, previous, last):
+        if index == size:
+            lines.append(ones)
+            return
+        for number in (0, 1):
+            if previous == last == number:
+                continue
+            if number == 0 and zero_count < max_of_type:
+                complete_line(index + 1, ones, zero_count + 1, one_count, last, 0)
+            elif number == 1 and one_count < max_of_type:
+                complete_line(
+                    index + 1, ones | (1 << index), zero_count, one_count + 1, last, 1
+                )
+
+    complete_line(0, 0, 0, 0, None, None)
+    return tuple(lines)
+
+
+@functools.lru_cache(maxsize=1 << 16)
+def matching_lines(size: int, filled: int, ones: int):
+    """Returns the valid lines that agree with the numbers already placed"""
+    return tuple(line for line in valid_lines(size) if line & filled == ones)
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_table(size: int):
+    """Returns a random 64-bit key for each number in each position, which
+    XORed together give the hash of a board"""
+    generator = random.Random(size)
+    return tuple(
+        tuple(
+            (generator.getrandbits(64), generator.getrandbits(64)) for _ in range(size)
+        )
+        for _ in range(size)
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def zobrist_array(size: int):
+    """Returns the keys of zobrist_table in a read-only array of unsigned
+    64-bit integers, indexed by row, column and number"""
+    keys = np.array(zobrist_table(size), dtype=np.uint64)
+    keys.flags.writeable = False
+    return keys
+
+
+# Each byte with the order of its bits reversed
+REVERSED_BYTES = tuple(
+    sum(((byte >> bit) & 1) << (7 - bit) for bit in range(8)) for byte in range(256)
 )
 
 
+@functools.lru_cache(maxsize=1 << 16)
+def reverse_bits(value: int, size: int) -> int:
+    """Reverses the order of the first size bits of the value"""
+    length = (size + 7) // 8
+    reversed_value = int.from_bytes(
+        bytes(REVERSED_BYTES[byte] for byte in value.to_bytes(length, "little")),
+        "big",
+    )
+    return reversed_value >> (8 * length - size)
+
+
+def transform_cells(cells, transform, inverse=False):
+    """Applies a transform returned by Board.canonical to the cells, or
+    undoes it with inverse, mapping a canonical board back to the original"""
+    transpose, flip_rows, flip_cols, complement = transform
+    cells = tuple(map(tuple, cells))
+    if transpose and not inverse:
+        cells = tuple(zip(*cells))
+    if flip_rows:
+        cells = cells[::-1]
+    if flip_cols:
+        cells = tuple(row[::-1] for row in cells)
+    if complement:
+        cells = tuple(tuple(1 - n if n != 2 else 2 for n in row) for row in cells)
+    if transpose and inverse:
+        cells = tuple(zip(*cells))
+    return cells
+
+
 class TakuzuState:
+    __slots__ = ("board", "id")
+
     state_id = 0
 
     def __init__(self, board):
@@ -27,6 +138,12 @@ class TakuzuState:
         self.id = TakuzuState.state_id
         TakuzuState.state_id += 1
 
+    def __eq__(self, other):
+        return isinstance(other, TakuzuState) and self.board == other.board
+
+    def __hash__(self):
+        return hash(self.board)
+
     def __lt__(self, other):
         depth_diff = (
             self.board.get_remaining_cells_count()
@@ -42,6 +159,34 @@ class TakuzuState:
 class Board:
     """Representação interna de um tabuleiro de Takuzu."""
 
+    __slots__ = (
+        "cells",
+        "size",
+        "invalid",
+        "count_pos_with_two_actions",
+        "forced_cells",
+        "two_action_cells",
+        "two_action_index",
+        "empty_count",
+        "col_counts",
+        "row_counts",
+        "complete_rows",
+        "complete_cols",
+        "rows_ones",
+        "cols_ones",
+        "rows_filled",
+        "cols_filled",
+        "possible_values",
+        "cells_reevaluated",
+        "zobrist",
+    )
+
+    # Number of moves made and of cells whose possible values were
+    # recalculated after them, across every board of the process. solve
+    # reports how much each search added to them.
+    total_moves = 0
+    total_cells_reevaluated = 0
+
     def __init__(self, cells):
         self.cells = cells
         self.size = len(cells)
@@ -51,61 +196,124 @@ class Board:
         """Calcula os valores do estado interno, para ser usado
         no tabuleiro inicial."""
         self.count_pos_with_two_actions = 0
-        self.remaining_cells = []
+
+        self.calculate_line_state()
+        self.calculate_hash()
+        return self.calculate_possible_values()
+
+    def calculate_hash(self):
+        """Calculates the Zobrist hash of the board, which set_number then
+        updates with a single XOR"""
+        table = zobrist_table(self.size)
+        self.zobrist = 0
+        for row in range(self.size):
+            for col in range(self.size):
+                number = self.get_number(row, col)
+                if number != 2:
+                    self.zobrist ^= table[row][col][number]
+
+    def __eq__(self, other):
+        return (
+            isinstance(other, Board)
+            and self.zobrist == other.zobrist
+            and self.get_rows() == other.get_rows()
+        )
+
+    def __hash__(self):
+        return self.zobrist
+
+    def calculate_line_state(self):
+        """Calculates the counts of each row/column and which of them are
+        already complete"""
         # Counts are stored at (zero_count, one_count) pairs for each row/column
         self.col_counts = ()
         self.row_counts = ()
+        # Lines are also encoded as integers with a bit set for each one, so
+        # complete lines can be looked up by a single integer, and with a bit
+        # set for each filled position
+        self.cols_ones = ()
+        self.rows_ones = ()
+        self.cols_filled = ()
+        self.rows_filled = ()
 
-        self.complete_rows = set()
-        self.complete_cols = set()
-
-        # Store which numbers can be placed for each cell
-        self.possible_values = ()
+        complete_rows = set()
+        complete_cols = set()
 
         for col in range(self.size):
-            zero_count, one_count = 0, 0
+            zero_count, one_count, ones, filled = 0, 0, 0, 0
             for row in range(self.size):
                 if self.cells[row][col] == 0:
                     zero_count += 1
+                    filled |= 1 << row
                 elif self.cells[row][col] == 1:
                     one_count += 1
+                    ones |= 1 << row
+                    filled |= 1 << row
             self.col_counts += ((zero_count, one_count),)
+            self.cols_ones += (ones,)
+            self.cols_filled += (filled,)
             if zero_count + one_count == self.size:
-                self.complete_cols.add(self.get_col(col))
+                complete_cols.add(ones)
         for row in range(self.size):
-            zero_count, one_count = 0, 0
+            zero_count, one_count, ones, filled = 0, 0, 0, 0
             for col in range(self.size):
                 if self.cells[row][col] == 0:
                     zero_count += 1
+                    filled |= 1 << col
                 elif self.cells[row][col] == 1:
                     one_count += 1
+                    ones |= 1 << col
+                    filled |= 1 << col
             self.row_counts += ((zero_count, one_count),)
+            self.rows_ones += (ones,)
+            self.rows_filled += (filled,)
             if zero_count + one_count == self.size:
-                self.complete_rows.add(self.get_row(row))
+                complete_rows.add(ones)
+
+        # The sets of complete lines are shared between a board and its
+        # children until one of them completes a new line
+        self.complete_rows = frozenset(complete_rows)
+        self.complete_cols = frozenset(complete_cols)
+
+    def calculate_possible_values(self):
+        """Calculates which numbers can be placed in each empty cell"""
+        # Store which numbers can be placed for each cell
+        self.possible_values = ()
+
+        # Remaining cells are kept in two buckets, both shared with the
+        # children: a stack of cells with a single possibility, stored as
+        # (cell, rest) pairs and placed first to reduce the branching factor,
+        # and the cells with two possibilities in discovery order. Placed and
+        # promoted cells are not removed, get_next_cell skips them instead.
+        self.forced_cells = None
+        self.two_action_cells = ()
+        self.two_action_index = 0
+        two_action_cells = []
+        self.empty_count = 0
 
         for row in range(self.size):
             row_possibilities = ()
             for col in range(self.size):
-                if self.cells[row][col] != 2:
+                if self.get_number(row, col) != 2:
                     row_possibilities += ((),)
                     continue
                 possibilities = tuple(self.actions_for_cell(row, col))
                 row_possibilities += (possibilities,)
+                self.empty_count += 1
                 if len(possibilities) == 2:
                     self.count_pos_with_two_actions += 1
-                    self.remaining_cells.append((row, col))
+                    two_action_cells.append((row, col))
                 elif len(possibilities) == 0:
                     # If it's impossible to complete a board,
                     # abort immediately to save computing costs
                     self.invalid = True
                     return self
                 else:
-                    # Insert cells with only one possibility at the front
-                    # of the list, so they're placed first, reducing the
-                    # branching factor
-                    self.remaining_cells.insert(0, (row, col))
+                    self.forced_cells = ((row, col), self.forced_cells)
             self.possible_values += (row_possibilities,)
 
+        self.two_action_cells = tuple(two_action_cells)
+
         return self
 
     def get_number(self, row: int, col: int) -> int:
@@ -119,6 +327,9 @@ class Board:
     def get_col(self, col: int):
         return tuple(self.cells[row][col] for row in range(self.size))
 
+    def get_rows(self):
+        return self.cells
+
     def adjacent_vertical_numbers(self, row: int, col: int) -> (int, int):
         """Devolve os valores imediatamente abaixo e acima,
         respectivamente."""
@@ -149,84 +360,340 @@ class Board:
             zeros, ones = count_tuple
             return (zeros, ones + 1) if value == 1 else (zeros + 1, ones)
 
-        def check_complete_line(count_tuple, completed_set, get_line):
+        def add_complete_line(count_tuple, completed_set, line_ones):
             zeros, ones = count_tuple
             if zeros + ones == self.size:
-                completed_set.add(get_line())
+                return completed_set | {line_ones}
+            return completed_set
 
-        new_row = self.cells[row][:col] + (value,) + self.cells[row][col + 1 :]
-        new_cells = self.cells[:row] + (new_row,) + self.cells[row + 1 :]
-        new_board = Board(new_cells)
+        new_board = self.__class__(self.place_number(row, col, value))
 
         line_count = sum_value_to_count(self.col_counts[col])
-        check_complete_line(
-            line_count, self.complete_cols, lambda: new_board.get_col(col)
+        line_ones = self.cols_ones[col] | (value << row)
+        new_board.complete_cols = add_complete_line(
+            line_count, self.complete_cols, line_ones
         )
 
-        new_col_counts = (
+        new_board.col_counts = (
             self.col_counts[:col] + (line_count,) + self.col_counts[col + 1 :]
         )
+        new_board.cols_ones = (
+            self.cols_ones[:col] + (line_ones,) + self.cols_ones[col + 1 :]
+        )
+        new_board.cols_filled = (
+            self.cols_filled[:col]
+            + (self.cols_filled[col] | (1 << row),)
+            + self.cols_filled[col + 1 :]
+        )
 
         line_count = sum_value_to_count(self.row_counts[row])
-        check_complete_line(
-            line_count, self.complete_rows, lambda: new_board.get_row(row)
+        line_ones = self.rows_ones[row] | (value << col)
+        new_board.complete_rows = add_complete_line(
+            line_count, self.complete_rows, line_ones
         )
 
-        new_row_counts = (
+        new_board.row_counts = (
             self.row_counts[:row] + (line_count,) + self.row_counts[row + 1 :]
         )
+        new_board.rows_ones = (
+            self.rows_ones[:row] + (line_ones,) + self.rows_ones[row + 1 :]
+        )
+        new_board.rows_filled = (
+            self.rows_filled[:row]
+            + (self.rows_filled[row] | (1 << col),)
+            + self.rows_filled[row + 1 :]
+        )
 
-        new_board.remaining_cells = self.remaining_cells[1:]
-        new_board.col_counts = new_col_counts
-        new_board.row_counts = new_row_counts
-        new_board.complete_cols = self.complete_cols.copy()
-        new_board.complete_rows = self.complete_rows.copy()
+        new_board.forced_cells = self.forced_cells
+        new_board.two_action_cells = self.two_action_cells
+        new_board.two_action_index = self.two_action_index
+        new_board.empty_count = self.empty_count - 1
         new_board.possible_values = self.possible_values
         new_board.count_pos_with_two_actions = self.count_pos_with_two_actions
+        new_board.zobrist = self.zobrist ^ zobrist_table(self.size)[row][col][value]
         new_board.calculate_next_possible_values(row, col)
 
         return new_board
 
+    def place_number(self, row: int, col: int, value: int):
+        """Returns a copy of the cells with the value in the given position"""
+        new_row = self.cells[row][:col] + (value,) + self.cells[row][col + 1 :]
+        return self.cells[:row] + (new_row,) + self.cells[row + 1 :]
+
     def calculate_next_possible_values(self, row: int, col: int):
         """Recebe a posição que foi alterada, de forma a atualizar os valores
         possíveis para as posições afetadas"""
-        # has_filled_col = sum(self.col_counts[col]) == self.size
-        # has_filled_row = sum(self.row_counts[row]) == self.size
+        Board.total_moves += 1
+        affected = self.affected_cells(row, col)
+
+        new_possible_values = list(self.possible_values)
+        reevaluated = 0
+        for r, c in affected:
+            old_possibilities = new_possible_values[r][c]
+            if len(old_possibilities) == 0:
+                continue
+
+            possibilities = tuple(self.actions_for_cell(r, c))
+            reevaluated += 1
+
+            if (r != row or c != col) and len(possibilities) == 0:
+                self.invalid = True
+                self.cells_reevaluated = reevaluated
+                Board.total_cells_reevaluated += reevaluated
+                return
+
+            if len(old_possibilities) == 2 and len(possibilities) < 2:
+                self.count_pos_with_two_actions -= 1
+                if not (r == row and c == col):
+                    self.forced_cells = ((r, c), self.forced_cells)
+
+            if possibilities != old_possibilities:
+                # Rows that did not change are shared with the parent board
+                row_possibilities = new_possible_values[r]
+                new_possible_values[r] = (
+                    row_possibilities[:c]
+                    + (possibilities,)
+                    + row_possibilities[c + 1 :]
+                )
+
+        self.possible_values = tuple(new_possible_values)
+        self.cells_reevaluated = reevaluated
+        Board.total_cells_reevaluated += reevaluated
+
+    def affected_cells(self, row: int, col: int):
+        """Returns the cells whose possible values may change after placing
+        a number in the given position"""
+        # Only the changed row and column are affected by the balance and
+        # adjacency rules. Cells are visited in row-major order, so cells with
+        # a single possibility are promoted in the same order as before.
+        affected = [(r, col) for r in range(row)]
+        affected += [(row, c) for c in range(self.size)]
+        affected += [(r, col) for r in range(row + 1, self.size)]
+
+        # Completing a line can also invalidate the last empty cell of other
+        # lines by the duplicate rule
+        if self.get_row_empty_count(row) == 0:
+            affected += self.last_empty_cells(
+                self.get_row_empty_count, self.get_row, row
+            )
+        if self.get_col_empty_count(col) == 0:
+            affected += [
+                (r, c)
+                for (c, r) in self.last_empty_cells(
+                    self.get_col_empty_count, self.get_col, col
+                )
+            ]
+
+        return affected
+
+    def last_empty_cells(self, get_empty_count, get_line, changed):
+        """Returns the (line, index) of the only empty cell of every other
+        line with a single empty cell"""
+        return [
+            (line, get_line(line).index(2))
+            for line in range(self.size)
+            if line != changed and get_empty_count(line) == 1
+        ]
+
+    def get_row_empty_count(self, row: int) -> int:
+        return self.size - sum(self.row_counts[row])
+
+    def get_col_empty_count(self, col: int) -> int:
+        return self.size - sum(self.col_counts[col])
+
+    def get_row_filled(self, row: int) -> int:
+        """Returns the row encoded as an integer with a bit set for each
+        filled position"""
+        return self.rows_filled[row]
+
+    def get_col_filled(self, col: int) -> int:
+        return self.cols_filled[col]
+
+    def line_deductions(self):
+        """Filters the valid line patterns of every incomplete row and column
+        by the numbers already placed and the complete lines, returning the
+        (row, col, number) placements shared by all the remaining patterns.
+        Returns None if some line has no pattern left."""
+        if self.size > MAX_PATTERN_LINE_SIZE:
+            return []
 
-        # Recalculate for affected row and column
-        new_possible_values = ()
-        for r in range(self.size):
-            row_possibilities = ()
-            for c in range(self.size):
-                old_possibilities = self.get_possibilities_for_cell(r, c)
-                if (r != row and c != col) or len(old_possibilities) == 0:
-                    row_possibilities += (old_possibilities,)
+        deductions = {}
+
+        def deduce_line(filled, ones, complete, get_cell):
+            patterns = [
+                pattern
+                for pattern in matching_lines(self.size, filled, ones)
+                if pattern not in complete
+            ]
+            if len(patterns) == 0:
+                return False
+
+            always_one = functools.reduce(lambda a, b: a & b, patterns)
+            sometimes_one = functools.reduce(lambda a, b: a | b, patterns)
+            for index in range(self.size):
+                if (filled >> index) & 1:
                     continue
+                if (always_one >> index) & 1:
+                    number = 1
+                elif not (sometimes_one >> index) & 1:
+                    number = 0
+                else:
+                    continue
+                # A row and a column may force different numbers in a cell
+                if deductions.setdefault(get_cell(index), number) != number:
+                    return False
+            return True
 
-                possibilities = tuple(self.actions_for_cell(r, c))
-
-                if (r != row or c != col) and len(possibilities) == 0:
-                    self.invalid = True
-                    return
-
-                if len(old_possibilities) == 2 and len(possibilities) < 2:
-                    self.count_pos_with_two_actions -= 1
-                    if not (r == row and c == col):
-                        self.remaining_cells.remove((r, c))
-                        self.remaining_cells.insert(0, (r, c))
-
-                row_possibilities += (possibilities,)
-
-            new_possible_values += (row_possibilities,)
+        for row in range(self.size):
+            if self.get_row_empty_count(row) != 0 and not deduce_line(
+                self.get_row_filled(row),
+                self.rows_ones[row],
+                self.complete_rows,
+                lambda col: (row, col),
+            ):
+                return None
+        for col in range(self.size):
+            if self.get_col_empty_count(col) != 0 and not deduce_line(
+                self.get_col_filled(col),
+                self.cols_ones[col],
+                self.complete_cols,
+                lambda row: (row, col),
+            ):
+                return None
+
+        return [(row, col, number) for (row, col), number in deductions.items()]
+
+    def propagate(self, singles=True, lines=False, counts=None):
+        """Places every number forced by the enabled rules, repeating until
+        nothing else can be deduced: singles places the cells with a single
+        possible value and lines the numbers forced by the valid line
+        patterns. The number of cells placed by each rule, and of
+        contradictions found, is added to counts. Returns the resulting
+        board, which is marked as invalid if a contradiction is found."""
+        if counts is None:
+            counts = {"single": 0, "line": 0, "contradiction": 0}
+
+        board = self
+        while not board.invalid and board.get_remaining_cells_count() > 0:
+            if singles:
+                row, col = board.get_next_cell()
+                possibilities = board.get_possibilities_for_cell(row, col)
+                if len(possibilities) == 1:
+                    board = board.set_number(row, col, possibilities[0])
+                    counts["single"] += 1
+                    continue
 
-        self.possible_values = new_possible_values
+            if not lines:
+                break
+
+            deductions = board.line_deductions()
+            if deductions is None:
+                board.invalid = True
+                break
+            if len(deductions) == 0:
+                break
+
+            for row, col, number in deductions:
+                if number not in board.get_possibilities_for_cell(row, col):
+                    board.invalid = True
+                    break
+                board = board.set_number(row, col, number)
+                counts["line"] += 1
+                if board.invalid:
+                    break
+
+        if board.invalid:
+            counts["contradiction"] += 1
+        return board
 
     def get_remaining_cells_count(self):
         """Devolve o número de posições em branco"""
-        return len(self.remaining_cells)
+        return self.empty_count
 
     def get_next_cell(self):
-        return self.remaining_cells[0]
+        """Returns the most recently found cell with a single possibility,
+        otherwise the first cell with two possibilities"""
+        forced_cells = self.forced_cells
+        while forced_cells is not None:
+            (row, col), rest = forced_cells
+            if len(self.possible_values[row][col]) != 0:
+                self.forced_cells = forced_cells
+                return (row, col)
+            forced_cells = rest
+        self.forced_cells = None
+
+        while self.two_action_index < len(self.two_action_cells):
+            row, col = self.two_action_cells[self.two_action_index]
+            if len(self.possible_values[row][col]) == 2:
+                return (row, col)
+            self.two_action_index += 1
+
+    def canonical(self):
+        """Returns the smallest of the 16 symmetric variants of the board
+        (transposed, reflected horizontally and vertically, and with the
+        zeros and ones swapped), which are solved the same way, as a tuple
+        with an integer per row, and the (transpose, flip_rows, flip_cols,
+        complement) transform that produces it, which transform_cells
+        applies and undoes. Only the line masks kept up to date by
+        set_number are read."""
+        size = self.size
+        lines = (
+            (self.rows_filled, self.rows_ones),
+            (self.cols_filled, self.cols_ones),
+        )
+
+        best = None
+        for transpose, (filled, ones) in enumerate(lines):
+            for complement in (0, 1):
+                if complement:
+                    ones = tuple(f & ~o for f, o in zip(filled, ones))
+                for flip_cols in (0, 1):
+                    if flip_cols:
+                        codes = tuple(
+                            (reverse_bits(f, size) << size) | reverse_bits(o, size)
+                            for f, o in zip(filled, ones)
+                        )
+                    else:
+                        codes = tuple((f << size) | o for f, o in zip(filled, ones))
+                    for flip_rows in (0, 1):
+                        key = codes[::-1] if flip_rows else codes
+                        if best is None or key < best[0]:
+                            best = (key, (transpose, flip_rows, flip_cols, complement))
+        return best
+
+    def get_two_action_cells(self):
+        """Yields every cell with two possibilities, in row-major order"""
+        for row, row_possibilities in enumerate(self.possible_values):
+            for col, possibilities in enumerate(row_possibilities):
+                if len(possibilities) == 2:
+                    yield (row, col)
+
+    def get_mrv_cell(self):
+        """Minimum remaining values: returns a cell with a single possibility,
+        otherwise the cell with two possibilities whose row and column have
+        the most empty cells, as it constrains the most other cells"""
+        cell = self.get_next_cell()
+        if cell is None or len(self.get_possibilities_for_cell(*cell)) == 1:
+            return cell
+        return max(
+            self.get_two_action_cells(),
+            key=lambda cell: self.get_row_empty_count(cell[0])
+            + self.get_col_empty_count(cell[1]),
+        )
+
+    def get_line_cell(self):
+        """Most constrained line: returns a cell with a single possibility,
+        otherwise a cell with two possibilities in the row or column with
+        the fewest empty cells"""
+        cell = self.get_next_cell()
+        if cell is None or len(self.get_possibilities_for_cell(*cell)) == 1:
+            return cell
+        return min(
+            self.get_two_action_cells(),
+            key=lambda cell: min(
+                self.get_row_empty_count(cell[0]), self.get_col_empty_count(cell[1])
+            ),
+        )
 
     def get_possibilities_for_cell(self, row, col):
         return self.possible_values[row][col]
@@ -234,8 +701,8 @@ class Board:
     def __repr__(self):
         return "\n".join(map(lambda x: "\t".join(map(str, x)), self.cells))
 
-    @staticmethod
-    def parse_instance_from_stdin():
+    @classmethod
+    def parse_instance_from_stdin(cls):
         """Lê o test do standard input (stdin) que é passado como argumento
         e retorna uma instância da classe Board.
 
@@ -250,7 +717,7 @@ class Board:
         for _ in range(board_size):
             row = sys.stdin.readline().strip("\n")
             cells.append(tuple(map(int, row.split("\t"))))
-        return Board(tuple(cells)).calculate_state()
+        return cls(tuple(cells)).calculate_state()
 
     def can_place_col_row(self, counts):
         """Returns which values can be placed in a column or row"""
@@ -301,25 +768,66 @@ class Board:
     def check_duplicate_col_row(self, row, col, number):
         """Returns true if the number can be placed in the given position
         according to the duplicate rule"""
-
-        def check_complete_line(count_tuple, completed_set, get_line):
-            zeros, ones = count_tuple
-            if zeros + ones + 1 == self.size:
-                return get_line() not in completed_set
-            return True
-
-        def set_number(line, index):
-            return line[:index] + (number,) + line[index + 1 :]
-
-        return check_complete_line(
-            self.col_counts[col],
-            self.complete_cols,
-            lambda: set_number(self.get_col(col), row),
-        ) and check_complete_line(
-            self.row_counts[row],
-            self.complete_rows,
-            lambda: set_number(self.get_row(row), col),
-        )
+        if self.get_row_empty_count(row) == 1:
+            if (self.rows_ones[row] | (number << col)) in self.complete_rows:
+                return False
+        if self.get_col_empty_count(col) == 1:
+            if (self.cols_ones[col] | (number << row)) in self.complete_cols:
+                return False
+        return True
+
+    def explain_impossible(self, row, col, number):
+        """Returns the filled cells that prevent placing the number in the
+        given position, or None if it can be placed"""
+        size = self.size
+        # Adjacency rule: two equal numbers next to the position
+        for row_step, col_step in ((0, 1), (1, 0)):
+            for first, second in ((-2, -1), (-1, 1), (1, 2)):
+                cells = {
+                    (row + row_step * first, col + col_step * first),
+                    (row + row_step * second, col + col_step * second),
+                }
+                if all(
+                    0 <= r < size and 0 <= c < size and self.get_number(r, c) == number
+                    for r, c in cells
+                ):
+                    return cells
+
+        # Balance rule: the line already has as many numbers of this type
+        # as it can take
+        max_of_type = (size + 1) // 2
+        row_cells = {(row, c) for c in range(size) if self.get_number(row, c) == number}
+        if len(row_cells) >= max_of_type:
+            return row_cells
+        col_cells = {(r, col) for r in range(size) if self.get_number(r, col) == number}
+        if len(col_cells) >= max_of_type:
+            return col_cells
+
+        # Duplicate rule: the number completes a line equal to another one
+        if self.get_row_empty_count(row) == 1:
+            ones = self.rows_ones[row] | (number << col)
+            for other in range(size):
+                if (
+                    other != row
+                    and self.get_row_empty_count(other) == 0
+                    and self.rows_ones[other] == ones
+                ):
+                    return {(row, c) for c in range(size) if c != col} | {
+                        (other, c) for c in range(size)
+                    }
+        if self.get_col_empty_count(col) == 1:
+            ones = self.cols_ones[col] | (number << row)
+            for other in range(size):
+                if (
+                    other != col
+                    and self.get_col_empty_count(other) == 0
+                    and self.cols_ones[other] == ones
+                ):
+                    return {(r, col) for r in range(size) if r != row} | {
+                        (r, other) for r in range(size)
+                    }
+
+        return None
 
     def actions_for_cell(self, row, col):
         if self.cells[row][col] != 2:
@@ -334,10 +842,760 @@ class Board:
         )
 
 
+class BitBoard(Board):
+    """Takuzu board where every row and column is stored as a pair of
+    integer bitmasks: which positions are filled and which of those are ones.
+    The rules are then checked with shifts, ANDs and popcounts instead of
+    reading the cells one at a time."""
+
+    __slots__ = ("max_of_type",)
+
+    def __init__(self, cells):
+        self.size = len(cells)
+        self.invalid = False
+        self.max_of_type = (self.size + 1) // 2
+
+        rows_filled, rows_ones = (), ()
+        for row in cells:
+            filled, ones = 0, 0
+            for col, value in enumerate(row):
+                if value != 2:
+                    filled |= 1 << col
+                if value == 1:
+                    ones |= 1 << col
+            rows_filled += (filled,)
+            rows_ones += (ones,)
+
+        cols_filled, cols_ones = (), ()
+        for col in range(self.size):
+            filled, ones = 0, 0
+            for row in range(self.size):
+                filled |= ((rows_filled[row] >> col) & 1) << row
+                ones |= ((rows_ones[row] >> col) & 1) << row
+            cols_filled += (filled,)
+            cols_ones += (ones,)
+
+        self.rows_filled, self.rows_ones = rows_filled, rows_ones
+        self.cols_filled, self.cols_ones = cols_filled, cols_ones
+
+    @property
+    def cells(self):
+        return tuple(self.get_row(row) for row in range(self.size))
+
+    def calculate_line_state(self):
+        self.complete_rows = frozenset(
+            ones
+            for filled, ones in zip(self.rows_filled, self.rows_ones)
+            if filled.bit_count() == self.size
+        )
+        self.complete_cols = frozenset(
+            ones
+            for filled, ones in zip(self.cols_filled, self.cols_ones)
+            if filled.bit_count() == self.size
+        )
+
+    def get_number(self, row: int, col: int) -> int:
+        if 0 <= row < self.size and 0 <= col < self.size:
+            if not (self.rows_filled[row] >> col) & 1:
+                return 2
+            return (self.rows_ones[row] >> col) & 1
+
+    def get_row(self, row: int):
+        filled, ones = self.rows_filled[row], self.rows_ones[row]
+        return tuple(
+            (ones >> col) & 1 if (filled >> col) & 1 else 2 for col in range(self.size)
+        )
+
+    def get_col(self, col: int):
+        filled, ones = self.cols_filled[col], self.cols_ones[col]
+        return tuple(
+            (ones >> row) & 1 if (filled >> row) & 1 else 2 for row in range(self.size)
+        )
+
+    def get_row_empty_count(self, row: int) -> int:
+        return self.size - self.rows_filled[row].bit_count()
+
+    def get_col_empty_count(self, col: int) -> int:
+        return self.size - self.cols_filled[col].bit_count()
+
+    def set_number(self, row: int, col: int, value: int):
+        row_bit, col_bit = 1 << row, 1 << col
+
+        new_board = BitBoard.__new__(BitBoard)
+        new_board.size = self.size
+        new_board.invalid = False
+        new_board.max_of_type = self.max_of_type
+
+        row_filled = self.rows_filled[row] | col_bit
+        row_ones = self.rows_ones[row] | (col_bit if value == 1 else 0)
+        new_board.rows_filled = (
+            self.rows_filled[:row] + (row_filled,) + self.rows_filled[row + 1 :]
+        )
+        new_board.rows_ones = (
+            self.rows_ones[:row] + (row_ones,) + self.rows_ones[row + 1 :]
+        )
+
+        col_filled = self.cols_filled[col] | row_bit
+        col_ones = self.cols_ones[col] | (row_bit if value == 1 else 0)
+        new_board.cols_filled = (
+            self.cols_filled[:col] + (col_filled,) + self.cols_filled[col + 1 :]
+        )
+        new_board.cols_ones = (
+            self.cols_ones[:col] + (col_ones,) + self.cols_ones[col + 1 :]
+        )
+
+        new_board.complete_rows = self.complete_rows
+        if row_filled.bit_count() == self.size:
+            new_board.complete_rows = self.complete_rows | {row_ones}
+        new_board.complete_cols = self.complete_cols
+        if col_filled.bit_count() == self.size:
+            new_board.complete_cols = self.complete_cols | {col_ones}
+
+        new_board.forced_cells = self.forced_cells
+        new_board.two_action_cells = self.two_action_cells
+        new_board.two_action_index = self.two_action_index
+        new_board.empty_count = self.empty_count - 1
+        new_board.possible_values = self.possible_values
+        new_board.count_pos_with_two_actions = self.count_pos_with_two_actions
+        new_board.zobrist = self.zobrist ^ zobrist_table(self.size)[row][col][value]
+        new_board.calculate_next_possible_values(row, col)
+
+        return new_board
+
+    def can_place_position(self, row, col):
+        row_filled, row_ones = self.rows_filled[row], self.rows_ones[row]
+        col_filled, col_ones = self.cols_filled[col], self.cols_ones[col]
+        row_ones_count, col_ones_count = row_ones.bit_count(), col_ones.bit_count()
+
+        possible = ()
+        if (
+            row_filled.bit_count() - row_ones_count < self.max_of_type
+            and col_filled.bit_count() - col_ones_count < self.max_of_type
+        ):
+            possible += (0,)
+        if row_ones_count < self.max_of_type and col_ones_count < self.max_of_type:
+            possible += (1,)
+        return possible
+
+    @staticmethod
+    def check_adjacent_line(filled, ones, index, number):
+        """Returns true if placing the number at the index of the line
+        does not create three equal adjacent numbers"""
+        mask = (ones if number == 1 else filled & ~ones) | (1 << index)
+        # Bit i is set if positions i, i+1 and i+2 all hold the number
+        triples = mask & (mask >> 1) & (mask >> 2)
+        # Only triples starting at index-2, index-1 or index contain the index
+        return not triples & ((0b111 << index) >> 2)
+
+    def check_adjacent(self, row, col, number):
+        return self.check_adjacent_line(
+            self.rows_filled[row], self.rows_ones[row], col, number
+        ) and self.check_adjacent_line(
+            self.cols_filled[col], self.cols_ones[col], row, number
+        )
+
+    def actions_for_cell(self, row, col):
+        if (self.rows_filled[row] >> col) & 1:
+            return ()
+
+        return (
+            number
+            for number in self.can_place_position(row, col)
+            if self.check_adjacent(row, col, number)
+            and self.check_duplicate_col_row(row, col, number)
+        )
+
+
+class NumpyBoard(Board):
+    """Takuzu board whose cells are stored in an int8 NumPy array, so the
+    initial state can be calculated with array reductions instead of
+    visiting every cell in Python"""
+
+    __slots__ = ()
+
+    # Possible values for each cell, indexed by can_place_zero + 2 * can_place_one
+    POSSIBILITIES = ((), (0,), (1,), (0, 1))
+
+    def __init__(self, cells):
+        self.cells = np.asarray(cells, dtype=np.int8)
+        self.size = len(self.cells)
+        self.invalid = False
+
+    def calculate_state(self):
+        self.calculate_line_state()
+        self.calculate_hash()
+
+        possible_zero = self.calculate_placeable(0)
+        possible_one = self.calculate_placeable(1)
+        codes = possible_zero + 2 * possible_one.astype(np.int8)
+
+        empty = self.cells == 2
+        two_actions = codes == 3
+        self.count_pos_with_two_actions = int(two_actions.sum())
+        self.empty_count = int(empty.sum())
+        self.forced_cells = None
+        self.two_action_cells = tuple(map(tuple, np.argwhere(two_actions).tolist()))
+        self.two_action_index = 0
+
+        if (codes[empty] == 0).any():
+            self.invalid = True
+            return self
+
+        self.possible_values = tuple(
+            tuple(self.POSSIBILITIES[code] for code in row) for row in codes.tolist()
+        )
+        for cell in np.argwhere(empty & ~two_actions).tolist():
+            self.forced_cells = (tuple(cell), self.forced_cells)
+
+        return self
+
+    def calculate_hash(self):
+        keys = zobrist_array(self.size)
+        keys = np.where(self.cells == 1, keys[:, :, 1], keys[:, :, 0])
+        self.zobrist = int(np.bitwise_xor.reduce(keys[self.cells != 2]))
+
+    def calculate_line_state(self):
+        zeros, ones = self.cells == 0, self.cells == 1
+        self.col_counts = tuple(
+            zip(zeros.sum(axis=0).tolist(), ones.sum(axis=0).tolist())
+        )
+        self.row_counts = tuple(
+            zip(zeros.sum(axis=1).tolist(), ones.sum(axis=1).tolist())
+        )
+
+        filled = self.cells != 2
+        self.rows_ones = self.pack_lines(ones)
+        self.cols_ones = self.pack_lines(ones.T)
+        self.rows_filled = self.pack_lines(filled)
+        self.cols_filled = self.pack_lines(filled.T)
+
+        self.complete_rows = frozenset(
+            line_ones
+            for line_ones, complete in zip(self.rows_ones, filled.all(axis=1))
+            if complete
+        )
+        self.complete_cols = frozenset(
+            line_ones
+            for line_ones, complete in zip(self.cols_ones, filled.all(axis=0))
+            if complete
+        )
+
+    @staticmethod
+    def pack_lines(mask):
+        """Returns the integer encoding of each row of the boolean array"""
+        # Pack each row into bytes, least significant bit first,
+        # and read them back as an integer
+        return tuple(
+            int.from_bytes(bytes(line), "little")
+            for line in np.packbits(mask, axis=1, bitorder="little").tolist()
+        )
+
+    def calculate_placeable(self, number):
+        """Returns a boolean array telling in which empty cells the number
+        can be placed, according to all the rules"""
+        size = self.size
+        max_of_type = (size + 1) // 2
+        equal = self.cells == number
+
+        # Balance rule
+        placeable = (self.cells == 2) & (
+            (equal.sum(axis=1) < max_of_type)[:, None]
+            & (equal.sum(axis=0) < max_of_type)[None, :]
+        )
+
+        # Adjacency rule, comparing each cell against sliding windows
+        # of its two neighbours on each side
+        padded = np.pad(equal, 2, constant_values=False)
+        for vec_row, vec_col in ((0, 1), (1, 0)):
+
+            def shifted(offset):
+                row, col = 2 + vec_row * offset, 2 + vec_col * offset
+                return padded[row : row + size, col : col + size]
+
+            placeable &= ~(
+                (shifted(-2) & shifted(-1))
+                | (shifted(-1) & shifted(1))
+                | (shifted(1) & shifted(2))
+            )
+
+        # Duplicate rule, only relevant for lines missing a single cell
+        placeable &= ~self.completes_duplicate(self.cells, number)
+        placeable &= ~self.completes_duplicate(self.cells.T, number).T
+
+        return placeable
+
+    @staticmethod
+    def completes_duplicate(cells, number):
+        """Returns a boolean array telling which empty cells would complete
+        their row into a copy of an already complete row"""
+        empty = cells == 2
+        duplicate = np.zeros_like(empty)
+        complete = cells[~empty.any(axis=1)]
+        almost_complete = np.flatnonzero(empty.sum(axis=1) == 1)
+        if len(complete) == 0 or len(almost_complete) == 0:
+            return duplicate
+
+        candidates = np.where(empty[almost_complete], number, cells[almost_complete])
+        matches = (candidates[:, None, :] == complete[None, :, :]).all(axis=2)
+        duplicate[almost_complete] = matches.any(axis=1)[:, None]
+        return duplicate & empty
+
+    def get_number(self, row: int, col: int) -> int:
+        if 0 <= row < self.size and 0 <= col < self.size:
+            return int(self.cells[row, col])
+
+    def get_row(self, row: int):
+        return tuple(self.cells[row].tolist())
+
+    def get_col(self, col: int):
+        return tuple(self.cells[:, col].tolist())
+
+    def get_rows(self):
+        return tuple(map(tuple, self.cells.tolist()))
+
+    def place_number(self, row: int, col: int, value: int):
+        cells = self.cells.copy()
+        cells[row, col] = value
+        return cells
+
+    def actions_for_cell(self, row, col):
+        if self.cells[row, col] != 2:
+            return ()
+
+        return super().actions_for_cell(row, col)
+
+    def __repr__(self):
+        return "\n".join(map(lambda x: "\t".join(map(str, x)), self.cells.tolist()))
+
+
+class MutableBoard(Board):
+    """Takuzu board changed in place, keeping a trail of every change so it
+    can be undone when backtracking, instead of allocating a new board
+    for each move"""
+
+    __slots__ = ("trail", "assignments")
+
+    def __init__(self, cells):
+        super().__init__([list(row) for row in cells])
+        # Each entry is (row, col, old_possibilities, was_assigned)
+        self.trail = []
+        self.assignments = 0
+
+    def calculate_line_state(self):
+        super().calculate_line_state()
+        self.col_counts = [list(counts) for counts in self.col_counts]
+        self.row_counts = [list(counts) for counts in self.row_counts]
+        self.cols_ones = list(self.cols_ones)
+        self.rows_ones = list(self.rows_ones)
+        self.cols_filled = list(self.cols_filled)
+        self.rows_filled = list(self.rows_filled)
+        self.complete_rows = set(self.complete_rows)
+        self.complete_cols = set(self.complete_cols)
+
+    def calculate_possible_values(self):
+        super().calculate_possible_values()
+        if self.invalid:
+            return self
+
+        self.possible_values = [list(row) for row in self.possible_values]
+        return self
+
+    def get_row(self, row: int):
+        return tuple(self.cells[row])
+
+    def get_rows(self):
+        return tuple(map(tuple, self.cells))
+
+    def get_next_cell(self):
+        """Returns the first empty cell with a single possibility, otherwise
+        the first one with two, or None if the board is complete"""
+        next_cell = None
+        for row, row_possibilities in enumerate(self.possible_values):
+            for col, possibilities in enumerate(row_possibilities):
+                if len(possibilities) == 1:
+                    return (row, col)
+                if len(possibilities) == 2 and next_cell is None:
+                    next_cell = (row, col)
+        return next_cell
+
+    def assign(self, row: int, col: int, value: int) -> bool:
+        """Places the number in the given position and updates the possible
+        values of the affected cells, recording every change in the trail.
+        Returns False if some empty cell is left without possibilities."""
+        self.trail.append((row, col, self.possible_values[row][col], True))
+        if len(self.possible_values[row][col]) == 2:
+            self.count_pos_with_two_actions -= 1
+        self.cells[row][col] = value
+        self.row_counts[row][value] += 1
+        self.col_counts[col][value] += 1
+        self.rows_ones[row] |= value << col
+        self.cols_ones[col] |= value << row
+        self.rows_filled[row] |= 1 << col
+        self.cols_filled[col] |= 1 << row
+        self.possible_values[row][col] = ()
+        self.empty_count -= 1
+        self.zobrist ^= zobrist_table(self.size)[row][col][value]
+        self.assignments += 1
+        Board.total_moves += 1
+
+        if self.get_row_empty_count(row) == 0:
+            self.complete_rows.add(self.rows_ones[row])
+        if self.get_col_empty_count(col) == 0:
+            self.complete_cols.add(self.cols_ones[col])
+
+        reevaluated = 0
+        consistent = True
+        for r, c in self.affected_cells(row, col):
+            old_possibilities = self.possible_values[r][c]
+            if len(old_possibilities) == 0:
+                continue
+
+            possibilities = tuple(self.actions_for_cell(r, c))
+            reevaluated += 1
+            if possibilities != old_possibilities:
+                self.trail.append((r, c, old_possibilities, False))
+                self.possible_values[r][c] = possibilities
+                if len(old_possibilities) == 2:
+                    self.count_pos_with_two_actions -= 1
+            if len(possibilities) == 0:
+                consistent = False
+                break
+
+        Board.total_cells_reevaluated += reevaluated
+        return consistent
+
+    def undo(self, mark: int):
+        """Reverts every change made since the trail had the given length"""
+        while len(self.trail) > mark:
+            row, col, possibilities, was_assigned = self.trail.pop()
+            if was_assigned:
+                value = self.cells[row][col]
+                if self.get_row_empty_count(row) == 0:
+                    self.complete_rows.discard(self.rows_ones[row])
+                if self.get_col_empty_count(col) == 0:
+                    self.complete_cols.discard(self.cols_ones[col])
+                self.cells[row][col] = 2
+                self.row_counts[row][value] -= 1
+                self.col_counts[col][value] -= 1
+                self.rows_ones[row] &= ~(1 << col)
+                self.cols_ones[col] &= ~(1 << row)
+                self.rows_filled[row] &= ~(1 << col)
+                self.cols_filled[col] &= ~(1 << row)
+                self.empty_count += 1
+                self.zobrist ^= zobrist_table(self.size)[row][col][value]
+            self.count_pos_with_two_actions += (len(possibilities) == 2) - (
+                len(self.possible_values[row][col]) == 2
+            )
+            self.possible_values[row][col] = possibilities
+
+
+def trail_dfs(board: MutableBoard, decisions, prune=None, budget=None):
+    """Depth-first search from the current state of the MutableBoard,
+    placing the numbers in place and undoing them through its trail when
+    backtracking. Yields the board every time it is solved, which then
+    changes when the search is resumed. The decisions on the current path
+    are kept in the given list, as (trail length before the decision, row,
+    col, values left) entries. Boards for which prune(decisions) is true
+    are not searched any deeper, and the search stops, leaving the board
+    and the decisions as they are, once budget numbers have been placed.
+    The decisions list is empty if the search ran to the end."""
+    while True:
+        cell = board.get_next_cell()
+        if cell is None:
+            yield board
+        else:
+            row, col = cell
+            decisions.append(
+                (
+                    len(board.trail),
+                    row,
+                    col,
+                    iter(board.get_possibilities_for_cell(row, col)),
+                )
+            )
+
+        # Try the next value of the deepest decision, backtracking
+        # whenever a decision runs out of values
+        while decisions:
+            mark, row, col, values = decisions[-1]
+            board.undo(mark)
+            value = next(values, None)
+            if value is None:
+                decisions.pop()
+            elif board.assign(row, col, value) and not (
+                prune is not None and prune(decisions)
+            ):
+                break
+        else:
+            return
+
+        if budget is not None and board.assignments >= budget:
+            return
+
+
+def trail_solutions(board: Board):
+    """Depth-first search that places the numbers in place on a single
+    MutableBoard, undoing them through its trail when backtracking.
+    Yields the MutableBoard every time it is solved, which then changes
+    when the search is resumed."""
+    board = MutableBoard(board.get_rows()).calculate_state()
+    if board.invalid:
+        return
+
+    yield from trail_dfs(board, [])
+
+
+def trail_search(board: Board):
+    """Returns the first solution found by trail_solutions, or None if there
+    is no solution."""
+    return next(trail_solutions(board), None)
+
+
+def iter_solutions(board: Board, limit=None):
+    """Lazily yields up to limit solutions of the board, or all of them,
+    each as a new board of the same type. The search only keeps the
+    current path, so memory does not grow with the number of solutions."""
+    for solution in itertools.islice(trail_solutions(board), limit):
+        yield board.__class__(solution.get_rows()).calculate_state()
+
+
+def count_solutions(board: Board, cap=None) -> int:
+    """Returns the number of solutions of the board, stopping the search as
+    soon as cap solutions are found"""
+    return sum(1 for _ in itertools.islice(trail_solutions(board), cap))
+
+
+def at_most(solver: CDCLSolver, literals, k: int):
+    """Adds clauses allowing at most k of the literals to be true, using
+    Sinz's sequential counter, where counter[j] is true if more than j of
+    the literals seen so far are true"""
+    counter = [solver.new_var() for _ in range(k)]
+    solver.add_clause((-literals[0], counter[0]))
+    for j in range(1, k):
+        solver.add_clause((-counter[j],))
+
+    for literal in literals[1:-1]:
+        previous, counter = counter, [solver.new_var() for _ in range(k)]
+        solver.add_clause((-literal, counter[0]))
+        for j in range(k):
+            solver.add_clause((-previous[j], counter[j]))
+        for j in range(1, k):
+            solver.add_clause((-literal, -previous[j - 1], counter[j]))
+        solver.add_clause((-literal, -previous[k - 1]))
+
+    solver.add_clause((-literals[-1], -counter[k - 1]))
+
+
+def board_to_cnf(board: Board) -> CDCLSolver:
+    """Encodes the board as a SAT formula, where the variable
+    row * size + col + 1 is true if the cell holds a 1"""
+    solver = CDCLSolver()
+    size = board.size
+    cells = [[solver.new_var() for _ in range(size)] for _ in range(size)]
+    rows = cells
+    cols = [[cells[row][col] for row in range(size)] for col in range(size)]
+
+    for row in range(size):
+        for col in range(size):
+            number = board.get_number(row, col)
+            if number != 2:
+                solver.add_clause((cells[row][col] if number else -cells[row][col],))
+
+    max_of_type = (size + 1) // 2
+    for lines in (rows, cols):
+        for line in lines:
+            # No three adjacent equal numbers
+            for index in range(size - 2):
+                triple = line[index : index + 3]
+                solver.add_clause(triple)
+                solver.add_clause([-var for var in triple])
+
+            if size > max_of_type:
+                at_most(solver, line, max_of_type)
+                at_most(solver, [-var for var in line], max_of_type)
+
+        # Every pair of lines must differ in at least one position
+        for first in range(size):
+            for second in range(first + 1, size):
+                differences = []
+                for a, b in zip(lines[first], lines[second]):
+                    different = solver.new_var()
+                    solver.add_clause((-different, a, b))
+                    solver.add_clause((-different, -a, -b))
+                    differences.append(different)
+                solver.add_clause(differences)
+
+    return solver
+
+
+def sat_search(board: Board):
+    """Solves the board with the CDCL SAT solver.
+    Returns the solved board, or None if there is no solution."""
+    if board.invalid:
+        return None
+    model = board_to_cnf(board).solve()
+    if model is None:
+        return None
+
+    size = board.size
+    cells = tuple(
+        tuple(int(model[row * size + col + 1]) for col in range(size))
+        for row in range(size)
+    )
+    return board.__class__(cells).calculate_state()
+
+
+def ida_trail_search(board: Board):
+    """IDA* on a single MutableBoard: depth-first searches that prune every
+    board whose number of cells placed plus Takuzu's heuristic (the cells
+    with two possibilities) is above a bound, raised after each search to
+    the smallest value pruned. The board and its trail are reused by every
+    search, undoing back to the initial board, so memory is linear in the
+    depth. Returns the solved board, or None if there is no solution."""
+    board = MutableBoard(board.get_rows()).calculate_state()
+    if board.invalid:
+        return None
+
+    def prune(decisions):
+        nonlocal next_bound
+        f = len(decisions) + board.count_pos_with_two_actions
+        if f <= bound:
+            return False
+        next_bound = min(next_bound, f)
+        return True
+
+    bound = board.count_pos_with_two_actions
+    while True:
+        next_bound = np.inf
+        board.undo(0)
+        solution = next(trail_dfs(board, [], prune=prune), None)
+        if solution is not None:
+            return solution
+
+        if next_bound == np.inf:
+            return None
+        bound = next_bound
+
+
+def backjump_search(board: Board):
+    """Depth-first search on a single MutableBoard, like trail_search, with
+    conflict-directed backjumping: every failure is explained by the cells
+    that caused it, so when a cell runs out of values the search jumps
+    straight back to the deepest decision to blame. The explanations are
+    also recorded as nogoods, so the same failing combination of numbers
+    is never tried again. Returns the solved board, or None if there is no
+    solution."""
+    board = MutableBoard(board.get_rows()).calculate_state()
+    if board.invalid:
+        return None
+
+    # Each entry is [trail length before the decision, row, col,
+    # values left, cells blamed for the values that failed]
+    decisions = []
+    # Index of the decision that placed each cell, givens are never blamed
+    levels = {}
+    # Nogoods, as tuples of (row, col, number), indexed by each placement
+    nogoods = {}
+
+    def blame(cells):
+        return {cell for cell in cells if cell in levels}
+
+    def explain_empty(row, col):
+        cells = set()
+        for number in (0, 1):
+            cells |= board.explain_impossible(row, col, number) or set()
+        return cells
+
+    def try_assign(row, col, value):
+        """Returns None if the number can be placed, otherwise the cells
+        that conflict with it"""
+        if not board.assign(row, col, value):
+            # The cell left without possibilities is the last one changed
+            return explain_empty(*board.trail[-1][:2])
+        for nogood in nogoods.get((row, col, value), ()):
+            if all(board.get_number(r, c) == number for r, c, number in nogood):
+                return {(r, c) for r, c, _ in nogood}
+        return None
+
+    def record_nogood(cells):
+        if len(cells) > MAX_NOGOOD_SIZE:
+            return
+        nogood = tuple((r, c, board.get_number(r, c)) for r, c in cells)
+        for placement in nogood:
+            nogoods.setdefault(placement, []).append(nogood)
+
+    while True:
+        cell = board.get_next_cell()
+        if cell is None:
+            return board
+
+        row, col = cell
+        values = list(board.get_possibilities_for_cell(row, col))
+        # Values ruled out before branching are blamed on what rules them out
+        blamed = set()
+        for number in (0, 1):
+            if number not in values:
+                blamed |= blame(board.explain_impossible(row, col, number))
+        decisions.append([len(board.trail), row, col, values, blamed])
+
+        while True:
+            mark, row, col, values, blamed = decisions[-1]
+            board.undo(mark)
+            levels.pop((row, col), None)
+
+            if len(values) == 0:
+                # Every value failed because of the blamed cells, so jump
+                # back to the deepest of them, which must change
+                decisions.pop()
+                if len(blamed) == 0:
+                    return None
+                record_nogood(blamed)
+                target = max(levels[cell] for cell in blamed)
+                for _, r, c, _, _ in decisions[target + 1 :]:
+                    levels.pop((r, c), None)
+                del decisions[target + 1 :]
+                _, r, c, _, target_blamed = decisions[target]
+                target_blamed |= blamed - {(r, c)}
+                continue
+
+            value = values.pop(0)
+            levels[(row, col)] = len(decisions) - 1
+            conflict = try_assign(row, col, value)
+            if conflict is None:
+                break
+            blamed |= blame(conflict) - {(row, col)}
+
+
 class Takuzu(Problem):
-    def __init__(self, board: Board):
+    def __init__(
+        self,
+        board: Board,
+        propagation=False,
+        line_propagation=False,
+        cell_order="first",
+        value_order="fixed",
+        stack_order=False,
+        symmetry=False,
+        tiebreak="fewest-empty",
+    ):
         """O construtor especifica o estado inicial."""
+        self.propagation = propagation
+        self.line_propagation = line_propagation
+        self.next_cell = CELL_ORDERS[cell_order]
+        self.value_order = value_order
+        # Searchers that expand the last child first want the best value last
+        self.stack_order = stack_order
+        self.tiebreak_key = TIEBREAKS[tiebreak]
+        # Children built while choosing the actions, until result takes them
+        self.children = {}
+        # Cells placed by each propagation rule, across every state
+        self.propagation_counts = {"single": 0, "line": 0, "contradiction": 0}
+        board = self.propagate(board)
         state = TakuzuState(board)
+        # With symmetry, children equivalent to a state already generated
+        # are skipped, as a solution of one maps to a solution of the other
+        self.symmetry = symmetry
+        self.seen = {board.canonical()[0]} if symmetry else None
         super().__init__(state)
         pass
 
@@ -347,37 +1605,885 @@ class Takuzu(Problem):
         if state.board.invalid or state.board.get_remaining_cells_count() == 0:
             return []
 
-        row, col = state.board.get_next_cell()
+        row, col = self.next_cell(state.board)
 
         possibilities = state.board.get_possibilities_for_cell(row, col)
-        return map(lambda number: (row, col, number), possibilities)
+        actions = [(row, col, number) for number in possibilities]
+        if self.symmetry:
+            actions = [action for action in actions if self.is_new_child(state, action)]
+        if self.value_order == "lcv":
+            return self.least_constraining(state, actions)
+        return actions
+
+    def child(self, state: TakuzuState, action):
+        """Returns the board resulting from the action, keeping it until
+        result is called"""
+        board = self.children.get((state, action))
+        if board is None:
+            board = self.propagate(state.board.set_number(*action))
+            self.children[(state, action)] = board
+        return board
+
+    def is_new_child(self, state: TakuzuState, action):
+        """Returns false if the child of the state is a symmetric variant of
+        a board already generated, forgetting it"""
+        if self.is_new(self.child(state, action)):
+            return True
+        del self.children[(state, action)]
+        return False
+
+    def is_new(self, board: Board):
+        """Returns false if a symmetric variant of the board was already
+        generated"""
+        if board.invalid:
+            return True
+        key = board.canonical()[0]
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def least_constraining(self, state: TakuzuState, actions):
+        """Least constraining value: orders the actions by the number of
+        choices left for the other cells after each one, most first"""
+
+        def choices_left(action):
+            board = self.child(state, action)
+            if board.invalid:
+                return -1
+            return board.get_remaining_cells_count() + board.count_pos_with_two_actions
+
+        return sorted(actions, key=choices_left, reverse=not self.stack_order)
 
     def result(self, state: TakuzuState, action):
         """Retorna o estado resultante de executar a 'action' sobre
         'state' passado como argumento. A ação a executar deve ser uma
         das presentes na lista obtida pela execução de
         self.actions(state)."""
-        (row, col, value) = action
-        return TakuzuState(state.board.set_number(row, col, value))
+        board = self.children.pop((state, action), None)
+        if board is None:
+            (row, col, value) = action
+            board = self.propagate(state.board.set_number(row, col, value))
+        return TakuzuState(board)
+
+    def propagate(self, board: Board):
+        """Places the numbers forced by the enabled propagation rules"""
+        if not (self.propagation or self.line_propagation):
+            return board
+        return board.propagate(
+            singles=self.propagation,
+            lines=self.line_propagation,
+            counts=self.propagation_counts,
+        )
 
     def goal_test(self, state: TakuzuState):
         """Retorna True se e só se o estado passado como argumento é
         um estado objetivo. Deve verificar se todas as posições do tabuleiro
         estão preenchidas com uma sequência de números adjacentes."""
-        return state.board.get_remaining_cells_count() == 0
+        return not state.board.invalid and state.board.get_remaining_cells_count() == 0
 
     def h(self, node: Node):
         """Função heuristica utilizada para a procura A*."""
         board = node.state.board
         return board.count_pos_with_two_actions
 
+    def tiebreak(self, node: Node):
+        return self.tiebreak_key(node)
+
+
+class RowState:
+    """State of the row-at-a-time search: the rows placed so far and the
+    prefix of every column, both encoded as integers with a bit set for
+    each one"""
+
+    __slots__ = ("rows", "cols", "ones_full", "zeros_full", "id")
+
+    def __init__(self, rows, cols, max_of_type):
+        self.rows = rows
+        self.cols = cols
+        # Columns that can no longer take a one or a zero
+        self.ones_full = 0
+        self.zeros_full = 0
+        for col, ones in enumerate(cols):
+            ones = ones.bit_count()
+            if ones >= max_of_type:
+                self.ones_full |= 1 << col
+            if len(rows) - ones >= max_of_type:
+                self.zeros_full |= 1 << col
+        self.id = TakuzuState.state_id
+        TakuzuState.state_id += 1
+
+    def __lt__(self, other):
+        if len(self.rows) != len(other.rows):
+            return len(self.rows) > len(other.rows)
+        return self.id < other.id
+
+
+class RowTakuzu(Problem):
+    """Alternative formulation where each action places a whole row,
+    chosen from the valid line patterns that match the row's numbers"""
+
+    def __init__(self, board: Board):
+        if board.size > MAX_PATTERN_LINE_SIZE:
+            raise ValueError(
+                f"boards bigger than {MAX_PATTERN_LINE_SIZE} are not supported"
+            )
+
+        size = board.size
+        self.size = size
+        self.max_of_type = (size + 1) // 2
+        self.full = (1 << size) - 1
+        self.row_patterns = tuple(
+            (
+                matching_lines(size, board.get_row_filled(row), board.rows_ones[row])
+                if not board.invalid
+                else ()
+            )
+            for row in range(size)
+        )
+        # Prefixes of the valid patterns of each column, by row, so the
+        # numbers already placed further down a column prune the rows above
+        col_patterns = [
+            matching_lines(size, board.get_col_filled(col), board.cols_ones[col])
+            for col in range(size)
+        ]
+        self.col_prefixes = tuple(
+            tuple(
+                frozenset(pattern & ((2 << row) - 1) for pattern in patterns)
+                for patterns in col_patterns
+            )
+            for row in range(size)
+        )
+        super().__init__(RowState((), (0,) * size, self.max_of_type))
+
+    def actions(self, state: RowState):
+        rows = state.rows
+        depth = len(rows)
+        if depth == self.size:
+            return []
+
+        # Columns where the last two numbers are equal cannot repeat them
+        if depth >= 2:
+            last = rows[-1]
+            repeated = ~(last ^ rows[-2]) & self.full
+        else:
+            last = repeated = 0
+
+        prefixes = self.col_prefixes[depth]
+        actions = []
+        for pattern in self.row_patterns[depth]:
+            if (
+                pattern & state.ones_full
+                or ~pattern & state.zeros_full
+                or repeated & ~(pattern ^ last)
+                or pattern in rows
+            ):
+                continue
+            cols = self.next_cols(state.cols, pattern, depth)
+            if not all(col in prefixes[index] for index, col in enumerate(cols)):
+                continue
+            if depth == self.size - 1 and len(set(cols)) != self.size:
+                continue
+            actions.append(pattern)
+        return actions
+
+    @staticmethod
+    def next_cols(cols, pattern, depth):
+        """Returns the column prefixes after placing the pattern as a row"""
+        return tuple(
+            ones | (((pattern >> col) & 1) << depth) for col, ones in enumerate(cols)
+        )
+
+    def result(self, state: RowState, action):
+        return RowState(
+            state.rows + (action,),
+            self.next_cols(state.cols, action, len(state.rows)),
+            self.max_of_type,
+        )
+
+    def goal_test(self, state: RowState):
+        return len(state.rows) == self.size
+
+    def h(self, node: Node):
+        return self.size - len(node.state.rows)
+
+    def tiebreak(self, node: Node):
+        return -len(node.state.rows)
+
+    def to_board(self, state: RowState, board_cls=Board):
+        """Returns the board with the rows placed in the given state"""
+        cells = tuple(
+            tuple((row >> col) & 1 for col in range(self.size)) for row in state.rows
+        )
+        return board_cls(cells).calculate_state()
+
+
+BOARD_TYPES = {
+    "tuple": Board,
+    "bitboard": BitBoard,
+    "numpy": NumpyBoard,
+}
+
+# Policies choosing the empty cell to branch on
+CELL_ORDERS = {
+    "first": lambda board: board.get_next_cell(),
+    "mrv": lambda board: board.get_mrv_cell(),
+    "line": lambda board: board.get_line_cell(),
+}
+
+# Policies ordering the values tried in a cell
+VALUE_ORDERS = ("fixed", "lcv")
+
+# Policies ordering the nodes with the same f value in best-first search,
+# lowest first, before the order they were added to the frontier
+TIEBREAKS = {
+    "fewest-empty": lambda node: node.state.board.get_remaining_cells_count(),
+    "deepest": lambda node: -node.depth,
+    "fifo": lambda node: 0,
+}
+
+SEARCHERS = {
+    "greedy": greedy_search,
+    "astar": astar_search,
+    "dfs": depth_first_tree_search,
+    "bfs": breadth_first_tree_search,
+    "rbfs": recursive_best_first_search,
+    "ida": iterative_deepening_astar_search,
+    "beam": beam_search,
+    "wastar": weighted_astar_search,
+}
+
+# Searchers that generate the same state again after forgetting or dropping
+# it, which symmetry would then skip as already generated
+REGENERATING_SEARCHERS = {"rbfs", "ida", "beam"}
+
+
+def symmetry_error(search, rows=False):
+    """Returns why symmetry cannot be used with the search, or None if it
+    can. Only Takuzu skips symmetric states, so it is not supported when
+    placing whole rows, nor by the engines."""
+    if rows:
+        return "symmetry is not supported when placing whole rows"
+    if search in ENGINES:
+        return f"symmetry is not supported by the {search} engine"
+    if search in REGENERATING_SEARCHERS:
+        return f"symmetry is not supported by {search} search"
+    return None
+
+# Engines that work directly on a board instead of a Problem,
+# returning the solved board
+ENGINES = {
+    "trail": trail_search,
+    "backjump": backjump_search,
+    "ida-trail": ida_trail_search,
+    "sat": sat_search,
+}
+
+
+def presolve_board(board: Board, stats):
+    """Places every number that can be deduced without searching, adding
+    how many to stats["presolved"]"""
+    empty_count = board.get_remaining_cells_count()
+    board = board.propagate(singles=True, lines=True)
+    stats["presolved"] = empty_count - board.get_remaining_cells_count()
+    return board
+
+
+def solve(
+    board: Board,
+    search="greedy",
+    presolve=True,
+    propagation=False,
+    line_propagation=False,
+    rows=False,
+    cell_order="first",
+    value_order="fixed",
+    symmetry=False,
+    tiebreak="fewest-empty",
+    search_args=None,
+    stats=None,
+):
+    """Solves the board with the given search algorithm or engine, returning
+    the solved board, or None if there is no solution. The presolve stage
+    first places every number that can be deduced without searching, so
+    fully determined boards never create a Problem. With rows, the search
+    places a whole row at a time instead of a single cell, otherwise
+    cell_order and value_order choose the ordering policies from
+    CELL_ORDERS and VALUE_ORDERS, and symmetry skips states equivalent to
+    one already generated, where symmetry_error allows it. tiebreak chooses
+    how best-first searchers order the nodes with the same f value, from
+    TIEBREAKS. search_args are passed to the searcher, such as the width of
+    beam_search or the weight of weighted_astar_search. Statistics are added to the stats dictionary, if
+    given, such as the moves made by the search, without the presolve
+    stage, and the cells re-evaluated after them."""
+    if stats is None:
+        stats = {}
+    if symmetry and symmetry_error(search, rows) is not None:
+        raise ValueError(symmetry_error(search, rows))
+
+    if presolve:
+        board = presolve_board(board, stats)
+        if board.invalid:
+            return None
+        if board.get_remaining_cells_count() == 0:
+            return board
+
+    if search_args is None:
+        search_args = {}
+
+    moves, cells_reevaluated = Board.total_moves, Board.total_cells_reevaluated
+    states = TakuzuState.state_id
+    if search in ENGINES:
+        solution = ENGINES[search](board)
+    elif rows:
+        problem = RowTakuzu(board)
+        goal_node = SEARCHERS[search](problem, **search_args)
+        solution = None
+        if goal_node is not None:
+            solution = problem.to_board(goal_node.state, board.__class__)
+    else:
+        takuzu = Takuzu(
+            board,
+            propagation=propagation,
+            line_propagation=line_propagation,
+            cell_order=cell_order,
+            value_order=value_order,
+            stack_order=search == "dfs",
+            symmetry=symmetry,
+            tiebreak=tiebreak,
+        )
+        goal_node = SEARCHERS[search](takuzu, **search_args)
+        if propagation or line_propagation:
+            stats["propagated"] = takuzu.propagation_counts
+        solution = goal_node.state.board if goal_node is not None else None
+
+    stats["moves"] = Board.total_moves - moves
+    stats["cells_reevaluated"] = Board.total_cells_reevaluated - cells_reevaluated
+    stats["states"] = TakuzuState.state_id - states
+    return solution
+
+
+# Searchers and engines raced by default in portfolio mode
+PORTFOLIO = ("greedy", "astar", "dfs", "backjump")
+
+# Seconds portfolio_solve waits for a result before checking for workers
+# that exited without one
+PORTFOLIO_POLL_INTERVAL = 0.1
+
+
+def portfolio_worker(board_cls, rows, search, results):
+    """Solves the board with one of the portfolio's searchers or engines,
+    sending its name and the solution's rows, or None, to results"""
+    solution = None
+    try:
+        solution = solve(board_cls(rows).calculate_state(), search, presolve=False)
+    finally:
+        rows = solution.get_rows() if solution is not None else None
+        results.put((search, rows))
+
+
+def portfolio_solve(board: Board, searches=PORTFOLIO, presolve=True, stats=None):
+    """Races the given searchers and engines, each in its own process, on
+    the same board, returning the first solution found, or None if there
+    is no solution. The other processes are stopped as soon as one of them
+    finishes with a solution, and those that exit without posting a
+    result, for example killed by the system, count as finished without
+    one. The winner is stored in stats["winner"]."""
+    if stats is None:
+        stats = {}
+
+    if presolve:
+        board = presolve_board(board, stats)
+        if board.invalid:
+            return None
+        if board.get_remaining_cells_count() == 0:
+            return board
+
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=portfolio_worker,
+            args=(board.__class__, board.get_rows(), search, results),
+            daemon=True,
+        )
+        for search in searches
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        pending = len(processes)
+        while pending > 0:
+            alive = sum(process.is_alive() for process in processes)
+            try:
+                search, rows = results.get(timeout=PORTFOLIO_POLL_INTERVAL)
+            except queue.Empty:
+                # Workers flush their result before exiting, so the results
+                # still missing can only come from the ones that were alive.
+                # The others were killed before posting one.
+                pending = min(pending, alive)
+                continue
+            pending -= 1
+            if rows is not None:
+                stats["winner"] = search
+                return board.__class__(rows).calculate_state()
+        return None
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+
+# Cells placed by a worker of parallel_solve before handing the rest of its
+# subtree back to be split between the workers
+SUBTREE_BUDGET = 2000
+
+
+def split_board(board: Board, count: int):
+    """Expands the search tree breadth-first until there are count open
+    boards, returning a solved board, if one is found first, and the list
+    of open boards"""
+    frontier = collections.deque([board])
+    while frontier and len(frontier) < count:
+        board = frontier.popleft()
+        cell = board.get_next_cell()
+        if cell is None:
+            return board, []
+        row, col = cell
+        for value in board.get_possibilities_for_cell(row, col):
+            child = board.set_number(row, col, value)
+            if not child.invalid:
+                frontier.append(child)
+    return None, list(frontier)
+
+
+def search_subtree(rows, budget=SUBTREE_BUDGET):
+    """Runs the depth-first search of trail_solutions on the board for up to
+    budget cells placed. Returns the solution's rows, or None, and the rows
+    of the open boards covering the part of the subtree left unexplored."""
+    board = MutableBoard(rows).calculate_state()
+    if board.invalid:
+        return None, []
+
+    decisions = []
+    for solution in trail_dfs(board, decisions, budget=budget):
+        return solution.get_rows(), []
+    if not decisions:
+        return None, []
+
+    # The current board and the values left at each decision
+    # cover everything that was not explored yet
+    open_rows = [board.get_rows()]
+    for mark, row, col, values in reversed(decisions):
+        board.undo(mark)
+        for value in values:
+            board.cells[row][col] = value
+            open_rows.append(board.get_rows())
+        board.cells[row][col] = 2
+    return None, open_rows
+
+
+def parallel_solve(
+    board: Board,
+    workers=None,
+    split=None,
+    budget=SUBTREE_BUDGET,
+    presolve=True,
+    stats=None,
+):
+    """Splits the search tree of the board in split open boards, by default
+    four per worker, and searches them in a pool of worker processes.
+    Workers hand back what is left of their subtree after budget cells
+    placed, which is split again between the workers, so idle workers take
+    over the long-running subtrees. Returns the first solution found, or
+    None if there is no solution. The number of subtrees searched is stored
+    in stats["subtrees"]."""
+    if stats is None:
+        stats = {}
+    if workers is None:
+        workers = os.cpu_count()
+    if split is None:
+        split = 4 * workers
+
+    if presolve:
+        board = presolve_board(board, stats)
+    if board.invalid:
+        return None
+
+    solution, subproblems = split_board(board, split)
+    if solution is not None:
+        return solution
+
+    stats["subtrees"] = 0
+    # Leaving the with block terminates the pool, so the workers still
+    # searching are stopped as soon as a solution is found
+    with multiprocessing.Pool(workers) as pool:
+        # Results, or the exceptions raised by the workers, in the order
+        # they are finished
+        results = queue.Queue()
+        pending = 0
+
+        def submit(rows):
+            nonlocal pending
+            stats["subtrees"] += 1
+            pending += 1
+            pool.apply_async(
+                search_subtree,
+                (rows, budget),
+                callback=results.put,
+                error_callback=results.put,
+            )
+
+        for subproblem in subproblems:
+            submit(subproblem.get_rows())
+
+        while pending > 0:
+            result = results.get()
+            pending -= 1
+            if isinstance(result, BaseException):
+                raise result
+            rows, open_rows = result
+            if rows is not None:
+                return board.__class__(rows).calculate_state()
+            for rows in open_rows:
+                submit(rows)
+    return None
+
+
+def parse_cells(rows, size: int):
+    """Returns the cells of a board of the given size from its rows, in the
+    format read by Board.parse_instance_from_stdin, raising ValueError if
+    they do not describe such a board"""
+    if len(rows) != size:
+        raise ValueError(f"expected {size} rows, found {len(rows)}")
+    cells = tuple(tuple(map(int, row.split("\t"))) for row in rows)
+    for index, row in enumerate(cells):
+        if len(row) != size:
+            raise ValueError(f"row {index + 1} has {len(row)} cells, expected {size}")
+        if not set(row) <= {0, 1, 2}:
+            raise ValueError(f"row {index + 1} has numbers other than 0, 1 and 2")
+    return cells
+
+
+def read_instances(file):
+    """Reads every instance of a stream, each in the format read by
+    Board.parse_instance_from_stdin, yielding their cells, or the
+    ValueError explaining why an instance could not be read, so the
+    following instances are still read"""
+    lines = (line.strip("\n") for line in file)
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            size = int(line)
+        except ValueError:
+            yield ValueError(f"invalid board size {line!r}")
+            continue
+        rows = list(itertools.islice(lines, size))
+        try:
+            yield parse_cells(rows, size)
+        except ValueError as error:
+            yield error
+
+
+def iter_instances(paths):
+    """Yields the name and cells of every instance in the given files, or in
+    the .in files of the given directories, or in stdin if there are no
+    paths. The cells of instances that cannot be read are replaced by the
+    exception explaining why."""
+    if not paths:
+        for index, cells in enumerate(read_instances(sys.stdin)):
+            yield "stdin#{}".format(index + 1), cells
+    for path in paths:
+        if os.path.isdir(path):
+            files = sorted(glob.glob(os.path.join(path, "*.in")))
+        else:
+            files = [path]
+        for name in files:
+            try:
+                with open(name) as file:
+                    instances = list(read_instances(file))
+            except OSError as error:
+                yield name, error
+                continue
+            for index, cells in enumerate(instances):
+                if len(instances) > 1:
+                    yield "{}#{}".format(name, index + 1), cells
+                else:
+                    yield name, cells
+
+
+def batch_worker(board_cls, cells, solve_args):
+    """Solves one instance of a batch, returning the solution as it is
+    printed and the time taken to solve it"""
+    start = time.perf_counter()
+    solution = solve(board_cls(cells).calculate_state(), **solve_args)
+    return str(solution), time.perf_counter() - start
+
+
+def batch_result(name, future):
+    """Returns the name, solution, solve time and error of a batch instance,
+    with the solution and time set to None if it failed"""
+    try:
+        return (name, *future.result(), None)
+    except Exception as error:
+        return name, None, None, error
+
+
+def batch_solve(instances, board_cls=Board, workers=None, pending=None, **solve_args):
+    """Solves the (name, cells) instances in a pool of worker processes kept
+    for the whole batch, with at most pending instances, by default two per
+    worker, submitted and not yet yielded. Yields the name, solution, solve
+    time and error of each instance in the order of the input. Instances
+    whose cells are an exception, or whose solve raises one, are yielded
+    with it as their error, without stopping the batch."""
+    if workers is None:
+        workers = os.cpu_count()
+    if pending is None:
+        pending = 2 * workers
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        submitted = collections.deque()
+        for name, cells in instances:
+            if len(submitted) == pending:
+                yield batch_result(*submitted.popleft())
+            if isinstance(cells, Exception):
+                future = concurrent.futures.Future()
+                future.set_exception(cells)
+            else:
+                future = executor.submit(batch_worker, board_cls, cells, solve_args)
+            submitted.append((name, future))
+        for name, future in submitted:
+            yield batch_result(name, future)
+
+
+def percentile(values, percent):
+    """Returns the nearest-rank percentile of the sorted values"""
+    rank = max(int(np.ceil(percent / 100 * len(values))), 1)
+    return values[rank - 1]
+
 
 if __name__ == "__main__":
     # Ler o ficheiro do standard input,
     # Usar uma técnica de procura para resolver a instância,
     # Retirar a solução a partir do nó resultante,
     # Imprimir para o standard output no formato indicado.
-    board = Board.parse_instance_from_stdin()
-    takuzu = Takuzu(board)
-    goal_node = greedy_search(takuzu)
-    print(goal_node.state.board)
+    parser = argparse.ArgumentParser(description="Solve a Takuzu board from stdin")
+    parser.add_argument(
+        "--board",
+        choices=BOARD_TYPES.keys(),
+        default="tuple",
+        help="internal representation of the board",
+    )
+    parser.add_argument(
+        "--search",
+        choices=list(SEARCHERS.keys()) + list(ENGINES.keys()),
+        default="greedy",
+        help="search algorithm used to solve the board",
+    )
+    parser.add_argument(
+        "--portfolio",
+        nargs="*",
+        choices=list(SEARCHERS.keys()) + list(ENGINES.keys()),
+        help="race these searchers and engines in parallel, by default "
+        + ", ".join(PORTFOLIO),
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        nargs="?",
+        const=0,
+        metavar="WORKERS",
+        help="split the search between worker processes, by default one per core",
+    )
+    parser.add_argument(
+        "--batch",
+        nargs="*",
+        metavar="PATH",
+        help="solve every instance in the given files or directories, or in "
+        "stdin, in a pool of worker processes",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="worker processes used by --batch, by default one per core",
+    )
+    parser.add_argument(
+        "--beam-width",
+        type=int,
+        default=10,
+        help="number of nodes kept at each depth by beam search",
+    )
+    parser.add_argument(
+        "--weight",
+        type=float,
+        default=2,
+        help="weight of the heuristic in weighted A*",
+    )
+    parser.add_argument(
+        "--no-presolve",
+        action="store_true",
+        help="search from the given board, without placing the forced numbers first",
+    )
+    parser.add_argument(
+        "--propagate",
+        action="store_true",
+        help="place every cell with a single possible value after each move",
+    )
+    parser.add_argument(
+        "--lines",
+        action="store_true",
+        help="place the numbers forced by the valid line patterns after each move",
+    )
+    parser.add_argument(
+        "--rows",
+        action="store_true",
+        help="place a whole row pattern at a time instead of a single cell",
+    )
+    parser.add_argument(
+        "--cell-order",
+        choices=CELL_ORDERS.keys(),
+        default="first",
+        help="policy choosing the cell to branch on",
+    )
+    parser.add_argument(
+        "--value-order",
+        choices=VALUE_ORDERS,
+        default="fixed",
+        help="policy ordering the values tried in a cell",
+    )
+    parser.add_argument(
+        "--symmetry",
+        action="store_true",
+        help="skip states that are symmetric variants of one already generated",
+    )
+    parser.add_argument(
+        "--tiebreak",
+        choices=TIEBREAKS.keys(),
+        default="fewest-empty",
+        help="order of the nodes with the same f value in best-first search",
+    )
+    parser.add_argument(
+        "--stats",
+        action="store_true",
+        help="print search statistics to stderr",
+    )
+    args = parser.parse_args()
+    if args.symmetry and symmetry_error(args.search, args.rows) is not None:
+        parser.error(symmetry_error(args.search, args.rows))
+
+    search_args = {}
+    if args.search == "beam":
+        search_args["width"] = args.beam_width
+    elif args.search == "wastar":
+        search_args["weight"] = args.weight
+
+    if args.batch is not None:
+        times = []
+        failed = 0
+        for name, solution, elapsed, error in batch_solve(
+            iter_instances(args.batch),
+            BOARD_TYPES[args.board],
+            workers=args.workers,
+            search=args.search,
+            presolve=not args.no_presolve,
+            propagation=args.propagate,
+            line_propagation=args.lines,
+            rows=args.rows,
+            cell_order=args.cell_order,
+            value_order=args.value_order,
+            symmetry=args.symmetry,
+            tiebreak=args.tiebreak,
+            search_args=search_args,
+        ):
+            # Each result is preceded by the name of its instance
+            print("# {}".format(name))
+            if error is not None:
+                failed += 1
+                print("error: {}".format(error), flush=True)
+                continue
+            print(solution, flush=True)
+            times.append(elapsed)
+            if args.stats:
+                print("{}: {:.4f}s".format(name, elapsed), file=sys.stderr)
+
+        if args.stats and failed:
+            print("{} instances failed".format(failed), file=sys.stderr)
+        if args.stats and times:
+            times.sort()
+            print(
+                "{} instances, p50 {:.4f}s, p95 {:.4f}s, p99 {:.4f}s".format(
+                    len(times),
+                    percentile(times, 50),
+                    percentile(times, 95),
+                    percentile(times, 99),
+                ),
+                file=sys.stderr,
+            )
+        sys.exit()
+
+    board = BOARD_TYPES[args.board].parse_instance_from_stdin()
+    stats = {}
+    if args.parallel is not None:
+        solution = parallel_solve(
+            board,
+            workers=args.parallel or None,
+            presolve=not args.no_presolve,
+            stats=stats,
+        )
+    elif args.portfolio is not None:
+        solution = portfolio_solve(
+            board,
+            args.portfolio or PORTFOLIO,
+            presolve=not args.no_presolve,
+            stats=stats,
+        )
+    else:
+        solution = solve(
+            board,
+            search=args.search,
+            presolve=not args.no_presolve,
+            propagation=args.propagate,
+            line_propagation=args.lines,
+            rows=args.rows,
+            cell_order=args.cell_order,
+            value_order=args.value_order,
+            symmetry=args.symmetry,
+            tiebreak=args.tiebreak,
+            search_args=search_args,
+            stats=stats,
+        )
+    print(solution)
+
+    if args.stats:
+        if "subtrees" in stats:
+            print("subtrees searched: {}".format(stats["subtrees"]), file=sys.stderr)
+        if "winner" in stats:
+            print("solved first by {}".format(stats["winner"]), file=sys.stderr)
+        if "presolved" in stats:
+            print(
+                "presolve filled {} of {} empty cells".format(
+                    stats["presolved"], board.get_remaining_cells_count()
+                ),
+                file=sys.stderr,
+            )
+        # Portfolio and parallel searches make their moves in other processes
+        if "moves" in stats:
+            print(
+                "cells re-evaluated: {} ({:.2f} per move)".format(
+                    stats["cells_reevaluated"],
+                    stats["cells_reevaluated"] / max(stats["moves"], 1),
+                ),
+                file=sys.stderr,
+            )
+        if "propagated" in stats:
+            print(
+                "states: {}, propagated: {}".format(
+                    stats["states"],
+                    ", ".join(
+                        "{} {}".format(count, rule)
+                        for rule, count in stats["propagated"].items()
+                    ),
+                ),
+                file=sys.stderr,
+            )
@@ -407,16 +407,16 @@ class injection:
 
 def memoize(fn, slot=None, maxsize=32):
     """Memoize fn: make it remember the computed value for any argument list.
-    If slot is specified, store result in that slot of first argument.
+    If slot is specified, store result in that slot of first argument, which
+    is considered empty while it is missing or None.
     If slot is false, use lru_cache for caching the values."""
     if slot:
         def memoized_fn(obj, *args):
-            if hasattr(obj, slot):
-                return getattr(obj, slot)
-            else:
+            val = getattr(obj, slot, None)
+            if val is None:
                 val = fn(obj, *args)
                 setattr(obj, slot, val)
-                return val
+            return val
     else:
         @functools.lru_cache(maxsize=maxsize)
         def memoized_fn(*args):
@@ -777,6 +777,139 @@ class PriorityQueue:
         heapq.heapify(self.heap)
 
 
+class IndexedPriorityQueue:
+    """A drop-in replacement for PriorityQueue that also keeps the position
+    of every item in the heap, so membership and lookup are O(1), and
+    deleting an item or changing its priority is O(log n) instead of a
+    linear scan. Items must be hashable and equal items are stored once:
+    appending an item already in the queue replaces its priority.
+    Entries are sorted by (f(x), tiebreak(x), insertion order), all computed
+    when the item is added, so the items themselves are never compared."""
+
+    def __init__(self, order='min', f=lambda x: x, tiebreak=lambda x: 0):
+        self.heap = []
+        self.index = {}
+        self.tiebreak = tiebreak
+        self.counter = 0
+        if order == 'min':
+            self.f = f
+        elif order == 'max':  # now item with max f(x)
+            self.f = lambda x: -f(x)  # will be popped first
+        else:
+            raise ValueError("Order must be either 'min' or 'max'.")
+
+    def entry(self, item, value):
+        self.counter += 1
+        return (value, self.tiebreak(item), self.counter, item)
+
+    def append(self, item):
+        """Insert item at its correct position."""
+        if item in self.index:
+            self.update(item, self.f(item))
+            return
+        self.heap.append(self.entry(item, self.f(item)))
+        self.index[item] = len(self.heap) - 1
+        self.sift_up(len(self.heap) - 1)
+
+    def extend(self, items):
+        """Insert each item in items at its correct position."""
+        for item in items:
+            self.append(item)
+
+    def pop(self):
+        """Pop and return the item (with min or max f(x) value)
+        depending on the order."""
+        if not self.heap:
+            raise Exception('Trying to pop from empty PriorityQueue.')
+        item = self.heap[0][-1]
+        self.remove(0)
+        return item
+
+    def update(self, key, value):
+        """Change the priority of key to value, moving it up or down. The
+        item is placed after the others with the same priority, as if it
+        was added again."""
+        position = self.index[key]
+        old_entry = self.heap[position]
+        entry = self.entry(old_entry[-1], value)
+        self.heap[position] = entry
+        if entry < old_entry:
+            self.sift_up(position)
+        else:
+            self.sift_down(position)
+
+    def remove(self, position):
+        """Remove the entry at the given position of the heap."""
+        last = self.heap.pop()
+        del self.index[last[-1]]
+        if position == len(self.heap):
+            return
+        del self.index[self.heap[position][-1]]
+        self.heap[position] = last
+        self.index[last[-1]] = position
+        self.sift_down(self.sift_up(position))
+
+    def sift_up(self, position):
+        """Move the entry at position up while it is smaller than its parent,
+        returning its final position."""
+        heap, index = self.heap, self.index
+        entry = heap[position]
+        while position > 0:
+            parent = (position - 1) >> 1
+            if not entry < heap[parent]:
+                break
+            heap[position] = heap[parent]
+            index[heap[position][-1]] = position
+            position = parent
+        heap[position] = entry
+        index[entry[-1]] = position
+        return position
+
+    def sift_down(self, position):
+        """Move the entry at position down while it is bigger than one of
+        its children."""
+        heap, index = self.heap, self.index
+        entry = heap[position]
+        size = len(heap)
+        while True:
+            child = 2 * position + 1
+            if child >= size:
+                break
+            if child + 1 < size and heap[child + 1] < heap[child]:
+                child += 1
+            if not heap[child] < entry:
+                break
+            heap[position] = heap[child]
+            index[heap[position][-1]] = position
+            position = child
+        heap[position] = entry
+        index[entry[-1]] = position
+
+    def __len__(self):
+        """Return current capacity of PriorityQueue."""
+        return len(self.heap)
+
+    def __contains__(self, key):
+        """Return True if the key is in PriorityQueue."""
+        return key in self.index
+
+    def __getitem__(self, key):
+        """Returns the value associated with key in PriorityQueue.
+        Raises KeyError if key is not present."""
+        try:
+            return self.heap[self.index[key]][0]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+
+    def __delitem__(self, key):
+        """Delete key from the PriorityQueue."""
+        try:
+            position = self.index[key]
+        except KeyError:
+            raise KeyError(str(key) + " is not in the priority queue")
+        self.remove(position)
+
+
 # ______________________________________________________________________________
 # Useful Shorthands
 
@@ -0,0 +1,68 @@
+import csv
+import itertools
+import sys
+import time
+
+from takuzu import CELL_ORDERS, VALUE_ORDERS, Board, Takuzu
+from search import (
+    InstrumentedProblem,
+    astar_search,
+    breadth_first_tree_search,
+    depth_first_tree_search,
+    greedy_search,
+)
+
+# Same searchers and column suffixes as report/data.csv
+SEARCHERS = {
+    "gs": greedy_search,
+    "astar": astar_search,
+    "dfs": depth_first_tree_search,
+    "bfs": breadth_first_tree_search,
+}
+
+
+def read_board(path):
+    with open(path) as file:
+        lines = file.read().split("\n")
+    size = int(lines[0])
+    return Board(
+        tuple(tuple(map(int, line.split("\t"))) for line in lines[1 : size + 1])
+    ).calculate_state()
+
+
+def benchmark(board, searcher, cell_order, value_order):
+    """Returns the time, generated and expanded nodes of solving the board"""
+    problem = InstrumentedProblem(
+        Takuzu(
+            board,
+            cell_order=cell_order,
+            value_order=value_order,
+            stack_order=searcher is depth_first_tree_search,
+        )
+    )
+    start = time.perf_counter()
+    searcher(problem)
+    return time.perf_counter() - start, problem.states, problem.succs
+
+
+if __name__ == "__main__":
+    # Usage: python utils/benchmark.py <instance.in>...
+    writer = csv.writer(sys.stdout)
+    writer.writerow(
+        ["n", "d", "cell_order", "value_order"]
+        + [f"{column}_{name}" for column in ("time", "gen", "exp") for name in SEARCHERS]
+    )
+
+    for path in sys.argv[1:]:
+        board = read_board(path)
+        for cell_order, value_order in itertools.product(CELL_ORDERS, VALUE_ORDERS):
+            results = [
+                benchmark(board, searcher, cell_order, value_order)
+                for searcher in SEARCHERS.values()
+            ]
+            writer.writerow(
+                [board.size, board.get_remaining_cells_count(), cell_order, value_order]
+                + [f"{result[0]:.4f}" for result in results]
+                + [result[1] for result in results]
+                + [result[2] for result in results]
+            )
@@ -1,4 +1,4 @@
-from takuzu import Takuzu, Board
+from takuzu import Takuzu, Board, count_solutions
 from search import (
     Problem,
     greedy_search,
@@ -22,7 +22,7 @@ class MultiSolutionProblem(Problem):
     def goal_test(self, state):
         result = self.problem.goal_test(state)
         if result:
-            self.found.add(state.board.cells)
+            self.found.add(state.board.get_rows())
             # reach the end if we found enough goal states
             return len(self.found) >= self.goal_len_limit
         return result
@@ -33,6 +33,9 @@ class MultiSolutionProblem(Problem):
     def value(self, state):
         return self.problem.value(state)
 
+    def tiebreak(self, node):
+        return self.problem.tiebreak(node)
+
     def __getattr__(self, attr):
         return getattr(self.problem, attr)
 
@@ -48,10 +51,7 @@ def empty_board_of_size(size):
 
 def has_only_one_solution(board):
     board_obj = Board(board).calculate_state()
-
-    problem = MultiSolutionProblem(Takuzu(board_obj), 2)
-    greedy_search(problem)
-    return len(problem.found) == 1
+    return count_solutions(board_obj, 2) == 1
 
 
 def remove_cells(board):
@@ -86,7 +86,9 @@ if __name__ == "__main__":
     board = empty_board_of_size(10)
     # board = Board.parse_instance_from_stdin()
 
-    problem = Takuzu(board)
+    # Skip symmetric variants, so no two boards are the same puzzle
+    # transposed, reflected or with the numbers swapped
+    problem = Takuzu(board, symmetry=True)
     generatorProblem = MultiSolutionProblem(problem, 50)
     greedy_search(generatorProblem)
 
@@ -0,0 +1,110 @@
+import contextlib
+import sys
+import tracemalloc
+import types
+from unittest import mock
+
+import search
+import takuzu
+from takuzu import BOARD_TYPES, Board, Takuzu
+from search import (
+    IndexedPriorityQueue,
+    InstrumentedProblem,
+    Node,
+    greedy_search,
+)
+
+
+class RecordingFrontier(IndexedPriorityQueue):
+    """Frontier that records the most nodes it held at once"""
+
+    max_len = 0
+
+    def append(self, item):
+        super().append(item)
+        RecordingFrontier.max_len = max(RecordingFrontier.max_len, len(self))
+
+
+def without_slots(cls, copies):
+    """Returns a copy of the class, and of its bases, that keeps the
+    attributes of its instances in a __dict__ instead of __slots__, as
+    the classes were before they declared them"""
+    if cls is object:
+        return object
+    if cls not in copies:
+        slots = vars(cls).get("__slots__", ())
+        namespace = {
+            name: value
+            for name, value in vars(cls).items()
+            if name != "__slots__" and name not in slots
+        }
+        bases = tuple(without_slots(base, copies) for base in cls.__bases__)
+        copy = type(cls.__name__, bases, namespace)
+        # Methods calling super() without arguments refer to the class
+        # they were defined in, which must now be the copy
+        for name, value in namespace.items():
+            if (
+                isinstance(value, types.FunctionType)
+                and value.__code__.co_freevars == ("__class__",)
+            ):
+                setattr(
+                    copy,
+                    name,
+                    types.FunctionType(
+                        value.__code__,
+                        value.__globals__,
+                        value.__name__,
+                        value.__defaults__,
+                        (types.CellType(copy),),
+                    ),
+                )
+        copies[cls] = copy
+    return copies[cls]
+
+
+def memory_per_frontier_node(cells, board_cls, searcher=greedy_search, slots=True):
+    """Solves the board, returning the peak traced memory, the number of
+    nodes generated by the search and the most nodes in its frontier at
+    once. Without slots, the search nodes, states and boards are copies of
+    their classes that keep their attributes in a __dict__."""
+    with contextlib.ExitStack() as stack:
+        stack.enter_context(
+            mock.patch.object(search, "IndexedPriorityQueue", RecordingFrontier)
+        )
+        if not slots:
+            copies = {}
+            for cls in (Node, takuzu.TakuzuState, board_cls):
+                without_slots(cls, copies)
+            for cls, copy in copies.items():
+                module = sys.modules[cls.__module__]
+                stack.enter_context(mock.patch.object(module, cls.__name__, copy))
+            board_cls = copies[board_cls]
+
+        board = board_cls(cells).calculate_state()
+        RecordingFrontier.max_len = 0
+        tracemalloc.start()
+        problem = InstrumentedProblem(Takuzu(board))
+        searcher(problem)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return peak, problem.states, RecordingFrontier.max_len
+
+
+if __name__ == "__main__":
+    # Usage: python utils/memory_report.py [board type] < <instance.in>
+    board_type = sys.argv[1] if len(sys.argv) > 1 else "tuple"
+    cells = Board.parse_instance_from_stdin().get_rows()
+    # The first search fills the caches shared by every search, such as the
+    # Zobrist keys, so it is left out of the comparison
+    memory_per_frontier_node(cells, BOARD_TYPES[board_type])
+
+    print("classes    nodes  max frontier  peak KiB  bytes/node  bytes/frontier node")
+    for name, slots in (("__dict__", False), ("__slots__", True)):
+        peak, nodes, frontier = memory_per_frontier_node(
+            cells, BOARD_TYPES[board_type], slots=slots
+        )
+        print(
+            f"{name:<9}{nodes:>7}{frontier:>14}{peak / 1024:>10.1f}"
+            f"{peak / max(nodes, 1):>12.0f}{peak / max(frontier, 1):>21.0f}"
+        )